@@ -0,0 +1,131 @@
+import hashlib
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+
+# Function to fingerprint a {file_name: content} map; equal file maps share one archive
+def files_fingerprint(files):
+    digest = hashlib.sha256()
+    for file_name in sorted(files):
+        digest.update(hashlib.sha256(file_name.encode("utf-8")).digest())
+        digest.update(hashlib.sha256(files[file_name].encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+# Function to write a {file_name: content} map as a deflated ZIP archive
+def write_archive(target, files):
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for file_name, content in files.items():
+            zip_file.writestr(file_name, content)
+
+
+# Cache of ZIP archives for generated code, keyed by content fingerprint.
+# Each distinct file map is compressed once; small archives are kept in memory and
+# archives whose content exceeds spill_bytes are written to a temporary directory
+# instead. Both tiers are evicted least recently used first. Shared by all sessions.
+class ArchiveCache:
+    def __init__(self, max_memory_bytes=64 * 1024 * 1024, max_disk_bytes=512 * 1024 * 1024,
+                 spill_bytes=8 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.spill_bytes = spill_bytes
+        self.hits = 0
+        self.builds = 0
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="qe_archives_")
+        self.directory = Path(self._temp_dir.name)
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # fingerprint -> archive bytes
+        self._disk = OrderedDict()  # fingerprint -> archive size on disk
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+
+    def _path(self, fingerprint):
+        return self.directory / f"{fingerprint}.zip"
+
+    def _build(self, fingerprint, files):
+        content_size = sum(len(content) for content in files.values())
+        if content_size > self.spill_bytes:
+            path = self._path(fingerprint)
+            tmp_path = path.with_name(f"{fingerprint}.{threading.get_ident()}.tmp")
+            write_archive(tmp_path, files)
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+            with self._lock:
+                self.builds += 1
+                self._disk_bytes -= self._disk.pop(fingerprint, 0)
+                self._disk[fingerprint] = size
+                self._disk_bytes += size
+                self._evict()
+        else:
+            buffer = BytesIO()
+            write_archive(buffer, files)
+            data = buffer.getvalue()
+            with self._lock:
+                self.builds += 1
+                self._memory_bytes -= len(self._memory.pop(fingerprint, b""))
+                self._memory[fingerprint] = data
+                self._memory_bytes += len(data)
+                self._evict()
+
+    def _evict(self):
+        # Always keep the most recent entry of each tier, even if it alone exceeds the limit
+        while len(self._memory) > 1 and self._memory_bytes > self.max_memory_bytes:
+            _, data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(data)
+        while len(self._disk) > 1 and self._disk_bytes > self.max_disk_bytes:
+            fingerprint, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                self._path(fingerprint).unlink()
+            except OSError:
+                pass
+
+    def _cached(self, fingerprint):
+        return fingerprint in self._memory or fingerprint in self._disk
+
+    # Build the archives that are not cached yet, compressing up to max_workers at once
+    # (zlib releases the GIL, so threads compress in parallel)
+    def build_many(self, file_maps, max_workers=4):
+        fingerprints = {files_fingerprint(files): files for files in file_maps}
+        with self._lock:
+            missing = {fingerprint: files for fingerprint, files in fingerprints.items() if not self._cached(fingerprint)}
+        if len(missing) == 1:
+            self._build(*next(iter(missing.items())))
+        elif missing:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                list(executor.map(lambda item: self._build(*item), missing.items()))
+
+    # Returns a readable binary file object with the archive for files, building it if needed
+    def open(self, files):
+        fingerprint = files_fingerprint(files)
+        built = False
+        while True:
+            with self._lock:
+                if fingerprint in self._memory:
+                    self.hits += not built
+                    self._memory.move_to_end(fingerprint)
+                    return BytesIO(self._memory[fingerprint])
+                if fingerprint in self._disk:
+                    self.hits += not built
+                    self._disk.move_to_end(fingerprint)
+                    # An open file stays readable even if the entry is evicted meanwhile
+                    return self._path(fingerprint).open("rb")
+            self._build(fingerprint, files)
+            built = True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "builds": self.builds,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes
+            }
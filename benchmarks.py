@@ -0,0 +1,313 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from archives import ArchiveCache, write_archive
+from code_artifacts import merge_generated_files, parse_generated_code
+from file_processors import FILE_EXTENSION_TYPES, extract_chunks
+from gemini_client import generate_text
+from model_backends import FakeClient, fake_test_cases_response
+from models import PRIORITIES, TestCase
+from project_assembler import assemble_project
+from prompts import (AUTOMATION_SYSTEM_INSTRUCTION, build_combined_automation_prompt, build_test_case_automation_prompt,
+                     parse_test_cases_response)
+from request_scheduler import RequestScheduler
+from storage import TestCaseStore
+from structured_output import JsonArrayStreamParser
+
+ROOT = Path(__file__).resolve().parent
+
+# Modules imported by streamlit_app.py at startup; together they should stay light
+APP_MODULES = (
+    "gemini_client", "model_backends", "request_scheduler", "job_queue", "archives", "code_artifacts",
+    "file_processors", "models", "planning", "page_objects", "project_assembler", "prompt_budget", "prompts",
+    "storage", "semantic_index"
+)
+# Heavy dependencies that are only imported at the point of use
+HEAVY_MODULES = ("google.generativeai", "PyPDF2", "docx", "pandas", "faiss", "sentence_transformers")
+
+
+# Benchmark workloads are synthetic and seeded, and model calls go to the fake backend with a
+# fixed latency, so numbers are comparable between runs and need no network access.
+FAKE_LATENCY = 0.02
+GENERATION_CALLS = 32
+GENERATION_WORKERS = (1, 4, 8)
+SUITE_SIZES = (10, 100, 500)
+RERUN_CASE_COUNTS = (100, 1000, 5000)
+STREAM_CHUNK_CHARS = 100
+DOCUMENT_PAGES = 50
+DOCUMENT_LINES_PER_PAGE = 40
+SPREADSHEET_ROWS = 5000
+
+
+# Function to time fn() (median of repeat runs)
+def median_time(fn, repeat=3):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+# Function to build count deterministic test cases spread over a few features
+def synthetic_test_cases(count):
+    features = ("Login", "Checkout", "Search", "Profile", "Cart", "Payment", "Settings", "Signup")
+    test_cases = []
+    for idx in range(1, count + 1):
+        feature = features[idx % len(features)]
+        test_cases.append(TestCase(
+            id=f"TC_{idx:05d}",
+            title=f"Verify {feature} page scenario {idx}",
+            preconditions=[f"User is on the {feature} page"],
+            test_data=[f"{feature.lower()}_value_{idx}"],
+            test_steps=[f"Open the {feature} page", f"Enter the data for scenario {idx}", "Submit the form"],
+            expected_results=[f"The {feature} page confirms scenario {idx}"],
+            priority=PRIORITIES[idx % len(PRIORITIES)]
+        ))
+    return test_cases
+
+
+# Function to generate per-test-case automation file maps with the fake backend
+def synthetic_file_maps(test_cases):
+    model = FakeClient().model_for(AUTOMATION_SYSTEM_INSTRUCTION)
+    return [parse_generated_code(model.generate_content(build_test_case_automation_prompt(tc)).text)
+            for tc in test_cases]
+
+
+# Function to write a minimal text PDF (Helvetica, one content stream per page) without extra libraries
+def synthetic_pdf(page_count, lines_per_page):
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        2: "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * page} 0 R" for page in range(page_count)), page_count
+        ),
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    }
+    for page in range(page_count):
+        lines = " ".join(f"(Requirement {page + 1}.{line + 1}: the system shall validate input field {line}) '"
+                         for line in range(lines_per_page))
+        stream = f"BT /F1 9 Tf 40 780 Td 11 TL {lines} ET"
+        objects[4 + 2 * page] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                                 f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * page} 0 R >>")
+        objects[5 + 2 * page] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number in sorted(objects):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{objects[number]}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    return bytes(output)
+
+
+def synthetic_docx(paragraph_count):
+    import docx
+    document = docx.Document()
+    for idx in range(paragraph_count):
+        document.add_paragraph(f"Requirement {idx + 1}: the system shall validate input field {idx % 40}.")
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def synthetic_xlsx(row_count):
+    import openpyxl
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["ID", "Requirement", "Priority"])
+    for idx in range(row_count):
+        sheet.append([f"REQ-{idx + 1}", f"The system shall validate input field {idx % 40}", PRIORITIES[idx % 3]])
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+# Function to time a cold import of modules in a fresh interpreter (median of repeat runs).
+# Returns None if any of the modules is not installed.
+def time_cold_import(modules, repeat=3):
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {', '.join(modules)}; "
+        "print(time.perf_counter() - started)"
+    )
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+# Benchmark: cold import time of the app's startup modules and of each heavy dependency
+def benchmark_imports(repeat=3):
+    results = {"app startup modules": time_cold_import(APP_MODULES, repeat)}
+    for module_name in HEAVY_MODULES:
+        results[module_name] = time_cold_import([module_name], repeat)
+    return results
+
+
+# Benchmark: wall time for a batch of automation calls against the fake backend at several
+# concurrency levels, through the same rate limiter and retry path as the app
+def benchmark_generation(repeat=3):
+    model = FakeClient(latency=FAKE_LATENCY).model_for(AUTOMATION_SYSTEM_INSTRUCTION)
+    prompts = [build_test_case_automation_prompt(tc) for tc in synthetic_test_cases(GENERATION_CALLS)]
+    results = {}
+    for workers in GENERATION_WORKERS:
+        scheduler = RequestScheduler(requests_per_minute=1_000_000, tokens_per_minute=10 ** 12)
+
+        def run():
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda prompt: generate_text(model, prompt, scheduler=scheduler), prompts))
+
+        results[f"{GENERATION_CALLS} calls, {workers} workers"] = median_time(run, repeat)
+    return results
+
+
+# Benchmark: parsing and merging model output for suites of increasing size
+def benchmark_parsing(repeat=3):
+    model = FakeClient().model_for(AUTOMATION_SYSTEM_INSTRUCTION)
+    results = {}
+    for size in SUITE_SIZES:
+        test_cases = synthetic_test_cases(size)
+        code = model.generate_content(build_combined_automation_prompt(test_cases, compact=False)).text
+        response = fake_test_cases_response(f"Generate {size} comprehensive test cases", random.Random(size))
+        chunks = [response[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(response), STREAM_CHUNK_CHARS)]
+        file_maps = synthetic_file_maps(test_cases)
+
+        def parse_stream():
+            parser = JsonArrayStreamParser("test_cases")
+            for chunk in chunks:
+                parser.feed(chunk)
+
+        results[f"parse {size}-case suite code"] = median_time(lambda: parse_generated_code(code), repeat)
+        results[f"parse {size} test cases"] = median_time(lambda: parse_test_cases_response(response), repeat)
+        results[f"stream-parse {size} test cases"] = median_time(parse_stream, repeat)
+        results[f"merge {size} per-case outputs"] = median_time(lambda: merge_generated_files(file_maps), repeat)
+        results[f"assemble {size}-case project"] = median_time(lambda: assemble_project(file_maps), repeat)
+    return results
+
+
+# Benchmark: ZIP build time for assembled projects, and serving a cached archive
+def benchmark_archives(repeat=3):
+    results = {}
+    for size in SUITE_SIZES:
+        files = assemble_project(synthetic_file_maps(synthetic_test_cases(size)))
+        archive_cache = ArchiveCache()
+        archive_cache.open(files).close()
+        results[f"build {size}-case project ZIP"] = median_time(lambda: write_archive(BytesIO(), files), repeat)
+        results[f"serve cached {size}-case ZIP"] = median_time(lambda: archive_cache.open(files).close(), repeat)
+    return results
+
+
+# Benchmark: text extraction speed per document type (None if its parser is not installed)
+def benchmark_extraction(repeat=3):
+    documents = {
+        f"PDF, {DOCUMENT_PAGES} pages": (".pdf", lambda: synthetic_pdf(DOCUMENT_PAGES, DOCUMENT_LINES_PER_PAGE)),
+        f"DOCX, {DOCUMENT_PAGES * DOCUMENT_LINES_PER_PAGE} paragraphs": (
+            ".docx", lambda: synthetic_docx(DOCUMENT_PAGES * DOCUMENT_LINES_PER_PAGE)
+        ),
+        f"XLSX, {SPREADSHEET_ROWS} rows": (".xlsx", lambda: synthetic_xlsx(SPREADSHEET_ROWS))
+    }
+    results = {}
+    for name, (extension, build) in documents.items():
+        file_type = FILE_EXTENSION_TYPES[extension]
+        try:
+            data = build()
+            extract_chunks(data, file_type)
+        except ImportError:
+            results[name] = None
+            continue
+        results[name] = median_time(lambda: extract_chunks(data, file_type), repeat)
+    return results
+
+
+# Function to time reruns of the Test Case Generator page with num_cases stored test cases,
+# using Streamlit's app testing harness and the fake backend. Meant to run in a fresh
+# interpreter, since the app's cached resources are created once per process.
+def measure_rerun(num_cases, repeat=3):
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory(prefix="qe_bench_") as directory:
+        directory = Path(directory)
+        os.environ.update({
+            "MODEL_BACKEND": "fake",
+            "FAKE_MODEL_LATENCY": "0",
+            "TEST_CASE_DB_PATH": str(directory / "bench.db"),
+            "GEMINI_CACHE_DIR": str(directory / "cache"),
+            "BLOB_STORE_DIR": str(directory / "blobs")
+        })
+        store = TestCaseStore(directory / "bench.db")
+        store.write_batch(inserts=[tc.to_dict() for tc in synthetic_test_cases(num_cases)])
+        store.close()
+
+        app = AppTest.from_file(str(ROOT / "streamlit_app.py"), default_timeout=300)
+        app.run()
+        app.sidebar.radio[0].set_value("Test Case Generator").run()
+        return median_time(app.run, repeat)
+
+
+# Benchmark: rerun time against the number of stored test cases (None if Streamlit is not installed)
+def benchmark_rerun(repeat=3):
+    results = {}
+    for num_cases in RERUN_CASE_COUNTS:
+        code = f"import benchmarks; print(benchmarks.measure_rerun({num_cases}, {repeat}))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        output = result.stdout.strip().splitlines()
+        results[f"rerun with {num_cases} test cases"] = (
+            float(output[-1]) if result.returncode == 0 and output else None
+        )
+    return results
+
+
+BENCHMARKS = {
+    "imports": benchmark_imports,
+    "generation": benchmark_generation,
+    "parsing": benchmark_parsing,
+    "rerun": benchmark_rerun,
+    "archives": benchmark_archives,
+    "extraction": benchmark_extraction
+}
+
+
+def print_report(results):
+    for benchmark_name, measurements in results.items():
+        print(f"{benchmark_name}:")
+        for name, seconds in measurements.items():
+            value = "unavailable" if seconds is None else f"{seconds * 1000:10.1f} ms"
+            print(f"  {name:<40} {value}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the QE Test Automation Suite")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the median is reported")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    results = {name: BENCHMARKS[name](repeat=args.repeat) for name in args.benchmarks or BENCHMARKS}
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
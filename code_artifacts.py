@@ -0,0 +1,184 @@
+import re
+
+FILE_HEADER = "// FILE: "
+CODE_FENCE = "```"
+
+
+# Incremental parser for generated code.
+# Text can be fed in arbitrary chunks (e.g. straight from a streaming response);
+# each "// FILE:" block is emitted as soon as the next header line arrives. Markdown
+# code fence lines are dropped, as is prose after a closing fence.
+class IncrementalCodeParser:
+    def __init__(self):
+        self.files = {}
+        self.current_file = None
+        self._current_lines = []
+        self._buffer = ""
+        self._in_fence = False
+        self._after_fence = False  # a fence closed; prose follows until the next header
+
+    @property
+    def current_text(self):
+        # Content of the file still being received, including any partial last line
+        return "\n".join(self._current_lines + [self._buffer]) if self._current_lines else self._buffer
+
+    def _process_line(self, line, completed):
+        if line.lstrip().startswith(CODE_FENCE):
+            # Markdown fences the model wraps around files are not part of any file
+            self._in_fence = not self._in_fence
+            self._after_fence = not self._in_fence
+            return
+        if line.startswith(FILE_HEADER):
+            self._after_fence = False
+            if self.current_file:
+                content = "\n".join(self._current_lines)
+                self.files[self.current_file] = content
+                completed.append((self.current_file, content))
+                self._current_lines = []
+            self.current_file = line.split(FILE_HEADER)[1].strip()
+        elif self.current_file and not self._after_fence:
+            self._current_lines.append(line)
+
+    def feed(self, text):
+        completed = []
+        lines = (self._buffer + text).split("\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            self._process_line(line, completed)
+        return completed
+
+    def close(self):
+        completed = []
+        self._process_line(self._buffer, completed)
+        self._buffer = ""
+        if self.current_file and self._current_lines:
+            content = "\n".join(self._current_lines)
+            self.files[self.current_file] = content
+            completed.append((self.current_file, content))
+        self.current_file = None
+        self._current_lines = []
+        return completed
+
+
+# Function to lazily yield (file_name, content) pairs from a stream of text chunks
+def iter_generated_files(chunks):
+    parser = IncrementalCodeParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+# Function to parse generated code
+def parse_generated_code(code):
+    return dict(iter_generated_files([code]))
+
+
+JAVA_ANNOTATION_PATTERN = re.compile(r'@\w+(\.\w+)*(\s*\((?:[^()]|\([^()]*\))*\))?')
+JAVA_COMMENT_PATTERN = re.compile(r'//[^\n]*|/\*.*?\*/', re.S)
+JAVA_CLASS_PATTERN = re.compile(r'\b(class|interface|enum|record)\s+(\w+)')
+
+
+# Function to split Java source into (header, members, footer) around the first top-level type body.
+# Members are the declarations at depth one of the type body (fields, methods, constructors,
+# nested types), each including its leading annotations and comments. Returns None when the
+# source has no recognisable type body.
+def split_java_class(source):
+    match = JAVA_CLASS_PATTERN.search(JAVA_COMMENT_PATTERN.sub(lambda m: " " * len(m.group()), source))
+    if not match:
+        return None
+    body_start = source.find("{", match.end())
+    if body_start < 0:
+        return None
+
+    members = []
+    depth = 0
+    member_start = body_start + 1
+    i = body_start
+    while i < len(source):
+        char = source[i]
+        if source.startswith("//", i):
+            i = source.find("\n", i)
+            i = len(source) if i < 0 else i
+            continue
+        if source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = len(source) if end < 0 else end + 2
+            continue
+        if char in "\"'":
+            i += 1
+            while i < len(source) and source[i] != char:
+                i += 2 if source[i] == "\\" else 1
+        elif char in "{(":
+            depth += 1
+        elif char in "})":
+            depth -= 1
+            if depth == 0:
+                if source[member_start:i].strip():
+                    members.append(source[member_start:i].strip("\n"))
+                return source[:body_start + 1], members, source[i:]
+            if depth == 1 and char == "}":
+                members.append(source[member_start:i + 1].strip("\n"))
+                member_start = i + 1
+        elif char == ";" and depth == 1:
+            members.append(source[member_start:i + 1].strip("\n"))
+            member_start = i + 1
+        i += 1
+    return None
+
+
+# Function to derive a stable identity for a class member so equivalent declarations from
+# different generations can be recognised: fields by name, methods by name and parameter types
+def java_member_key(member):
+    header = JAVA_COMMENT_PATTERN.sub(" ", member)
+    header = JAVA_ANNOTATION_PATTERN.sub(" ", header)
+    header = re.split(r'[{=;]', header, maxsplit=1)[0]
+    header = " ".join(header.split())
+    method = re.search(r'(\w+)\s*\(([^)]*)\)', header)
+    if method:
+        params = [" ".join(param.split()[:-1]) for param in method.group(2).split(",") if param.strip()]
+        return f"{method.group(1)}({','.join(params)})"
+    names = re.findall(r'\w+', header)
+    return names[-1] if names else header
+
+
+# Function to merge two generated versions of the same Java class.
+# Imports are unioned and members missing from the first version are appended to it, so shared
+# Page Objects generated in separate calls collapse into one class with every locator and action.
+def merge_java_sources(first, second):
+    if first.strip() == second.strip():
+        return first
+    first_parts = split_java_class(first)
+    second_parts = split_java_class(second)
+    if first_parts is None or second_parts is None:
+        return first
+
+    header, members, footer = first_parts
+    known_keys = {java_member_key(member) for member in members}
+    for member in second_parts[1]:
+        key = java_member_key(member)
+        if key not in known_keys:
+            known_keys.add(key)
+            members.append(member)
+
+    imports = [line for line in header.splitlines() if line.strip().startswith("import ")]
+    new_imports = [line for line in second_parts[0].splitlines()
+                   if line.strip().startswith("import ") and line not in imports]
+    if new_imports:
+        lines = header.splitlines()
+        insert_at = max((i for i, line in enumerate(lines) if line.strip().startswith("import ")), default=0) + 1
+        header = "\n".join(lines[:insert_at] + new_imports + lines[insert_at:])
+    return header + "\n" + "\n\n".join(members) + "\n" + footer
+
+
+# Function to merge per-test-case (or per-shard) file maps into one suite.
+# Files produced by more than one generation (typically shared Page Objects) are kept once;
+# differing versions of the same Java class are merged member by member.
+def merge_generated_files(file_maps):
+    merged = {}
+    for files in file_maps:
+        for file_name, content in files.items():
+            if file_name not in merged:
+                merged[file_name] = content
+            elif file_name.endswith(".java"):
+                merged[file_name] = merge_java_sources(merged[file_name], content)
+    return merged
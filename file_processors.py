@@ -0,0 +1,226 @@
+from collections import OrderedDict
+from concurrent.futures import as_completed
+from io import BytesIO
+from pathlib import Path
+
+# File processing functions
+# Each extractor is a generator yielding text chunks of roughly EXTRACTION_CHUNK_CHARS
+# (pages, paragraph batches or row batches) so large documents never have to be
+# materialised as one string. on_progress(fraction) is called as extraction advances.
+# Parser libraries are imported on first use, so the app and its extraction workers
+# only load the ones needed for the file types actually uploaded.
+EXTRACTION_CHUNK_CHARS = 4000
+SPREADSHEET_CHUNK_ROWS = 500
+
+def batch_text(pieces, max_chars=EXTRACTION_CHUNK_CHARS):
+    batch = []
+    batch_len = 0
+    for piece in pieces:
+        if batch and batch_len + len(piece) > max_chars:
+            yield "\n".join(batch)
+            batch = []
+            batch_len = 0
+        batch.append(piece)
+        batch_len += len(piece) + 1
+    if batch:
+        yield "\n".join(batch)
+
+def report_file_progress(file, on_progress):
+    size = getattr(file, "size", None) or len(file.getbuffer())
+    if on_progress and size:
+        on_progress(min(file.tell() / size, 1.0))
+
+def extract_text_from_txt(file, on_progress=None):
+    def lines():
+        for line in file:
+            yield line.decode("utf-8", errors="replace").rstrip("\r\n")
+            report_file_progress(file, on_progress)
+    yield from batch_text(lines())
+
+def extract_text_from_pdf(file, on_progress=None):
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(file)
+    page_count = len(pdf_reader.pages)
+    for page_number, page in enumerate(pdf_reader.pages, start=1):
+        text = page.extract_text() or ""
+        if on_progress:
+            on_progress(page_number / page_count)
+        if text.strip():
+            yield text
+
+def extract_text_from_docx(file, on_progress=None):
+    import docx
+    doc = docx.Document(file)
+    paragraph_count = len(doc.paragraphs) or 1
+    def paragraphs():
+        for index, para in enumerate(doc.paragraphs, start=1):
+            if para.text.strip():
+                yield para.text
+            if on_progress and index % 100 == 0:
+                on_progress(index / paragraph_count)
+    yield from batch_text(paragraphs())
+
+def extract_text_from_csv(file, on_progress=None):
+    import pandas as pd
+    for df in pd.read_csv(file, chunksize=SPREADSHEET_CHUNK_ROWS):
+        yield df.to_markdown()
+        report_file_progress(file, on_progress)
+
+def extract_text_from_xlsx(file, on_progress=None):
+    import openpyxl
+    import pandas as pd
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        row_count = sheet.max_row or 0
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(col) if col is not None else f"Unnamed: {i}" for i, col in enumerate(header)]
+        batch = []
+        for row_number, row in enumerate(rows, start=2):
+            batch.append(row)
+            if len(batch) == SPREADSHEET_CHUNK_ROWS:
+                yield pd.DataFrame(batch, columns=columns).to_markdown()
+                batch = []
+                if on_progress and row_count:
+                    on_progress(min(row_number / row_count, 1.0))
+        if batch:
+            yield pd.DataFrame(batch, columns=columns).to_markdown()
+    finally:
+        workbook.close()
+
+FILE_PROCESSORS = {
+    "text/plain": extract_text_from_txt,
+    "application/pdf": extract_text_from_pdf,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": extract_text_from_docx,
+    "text/csv": extract_text_from_csv,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": extract_text_from_xlsx
+}
+
+# Browsers report some MIME types inconsistently (e.g. CSV on Windows), so fall back to the extension
+FILE_EXTENSION_TYPES = {
+    ".txt": "text/plain",
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".csv": "text/csv",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+
+def resolve_file_type(file_name, mime_type):
+    if mime_type in FILE_PROCESSORS:
+        return mime_type
+    return FILE_EXTENSION_TYPES.get(Path(file_name).suffix.lower())
+
+# Worker entry points. They live at module level (not in the Streamlit script) so that
+# process pool workers can import them, and take raw bytes so arguments pickle cheaply.
+def extract_chunks(data, file_type):
+    return list(FILE_PROCESSORS[file_type](BytesIO(data)))
+
+def extract_pdf_pages(data, start, stop):
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(BytesIO(data))
+    pages = []
+    for page_number in range(start, stop):
+        text = pdf_reader.pages[page_number].extract_text() or ""
+        if text.strip():
+            pages.append(text)
+    return pages
+
+def count_pdf_pages(data):
+    import PyPDF2
+    return len(PyPDF2.PdfReader(BytesIO(data)).pages)
+
+# Function to extract many files concurrently in a process pool.
+# files is a list of (file_name, file_type, data). Large PDFs are split into page ranges
+# so one big document is spread across workers too. Returns one chunk list per file,
+# in document order (None for a file that failed), plus a list of (file index, error) for
+# the failed files; indexes rather than names, since two uploads may share a name.
+# on_progress(fraction, file_name) is called in the caller's thread as tasks finish.
+def extract_files_in_pool(executor, files, pdf_pages_per_task=25, on_progress=None):
+    futures = {}
+    parts_per_file = []
+    errors = {}
+    for file_index, (file_name, file_type, data) in enumerate(files):
+        ranges = None
+        if file_type == "application/pdf":
+            try:
+                page_count = count_pdf_pages(data)
+            except Exception as e:
+                # Corrupt or encrypted PDF: report it like a failed extraction and skip it
+                errors[file_index] = e
+                parts_per_file.append(0)
+                continue
+            if page_count > pdf_pages_per_task:
+                ranges = [(start, min(start + pdf_pages_per_task, page_count))
+                          for start in range(0, page_count, pdf_pages_per_task)]
+        if ranges:
+            for part_index, (start, stop) in enumerate(ranges):
+                futures[executor.submit(extract_pdf_pages, data, start, stop)] = (file_index, part_index)
+            parts_per_file.append(len(ranges))
+        else:
+            futures[executor.submit(extract_chunks, data, file_type)] = (file_index, 0)
+            parts_per_file.append(1)
+
+    results = [[None] * parts for parts in parts_per_file]
+    for done, future in enumerate(as_completed(futures), start=1):
+        file_index, part_index = futures[future]
+        try:
+            results[file_index][part_index] = future.result()
+        except Exception as e:
+            errors[file_index] = e
+        if on_progress:
+            on_progress(done / len(futures), files[file_index][0])
+
+    file_chunks = []
+    for file_index, parts in enumerate(results):
+        if file_index in errors:
+            file_chunks.append(None)
+        else:
+            file_chunks.append([chunk for part in parts for chunk in part])
+    return file_chunks, sorted(errors.items())
+
+# Cache of extraction results keyed by file content hash: the chunk list of a file, or the
+# error message for a file that could not be read, so failures are not re-parsed on every
+# rerun either. Bounded by the total characters cached and evicted least recently used first.
+class ExtractionCache:
+    def __init__(self, max_chars=32 * 1024 * 1024):
+        self.max_chars = max_chars
+        self._entries = OrderedDict()  # file hash -> (chunks, error message)
+        self._chars = {}  # file hash -> characters cached for the entry
+        self._total_chars = 0
+
+    def __contains__(self, file_hash):
+        return file_hash in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Returns (chunks, error message) for a cached file, or None
+    def get(self, file_hash):
+        entry = self._entries.get(file_hash)
+        if entry is not None:
+            self._entries.move_to_end(file_hash)
+        return entry
+
+    # set_chunks and set_error return the stored (chunks, error message) entry
+    def set_chunks(self, file_hash, chunks):
+        return self._set(file_hash, (list(chunks), None))
+
+    def set_error(self, file_hash, error):
+        return self._set(file_hash, (None, str(error)))
+
+    def _set(self, file_hash, entry):
+        chunks, error = entry
+        chars = sum(len(chunk) for chunk in chunks) if chunks is not None else len(error)
+        self._total_chars -= self._chars.pop(file_hash, 0)
+        self._entries.pop(file_hash, None)
+        self._entries[file_hash] = entry
+        self._chars[file_hash] = chars
+        self._total_chars += chars
+        # Always keep the newest entry, even if it alone exceeds the limit
+        while len(self._entries) > 1 and self._total_chars > self.max_chars:
+            evicted, _ = self._entries.popitem(last=False)
+            self._total_chars -= self._chars.pop(evicted)
+        return entry
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from request_scheduler import BULK, DEFAULT_OUTPUT_TOKENS, estimate_tokens
+
+
+# Process-wide Gemini client: configures the SDK once and holds the model (and with it the
+# underlying connection) for every session. The SDK is imported and configured on first
+# use, so sessions that never call Gemini don't load it. Health is verified with a
+# lightweight model metadata call at most once per health_check_interval seconds.
+class GeminiClient:
+    def __init__(self, api_key, model_name, health_check_interval=300):
+        self.model_name = model_name if "/" in model_name else f"models/{model_name}"
+        self.health_check_interval = health_check_interval
+        self.healthy = True
+        self.last_error = None
+        self.closed = False
+        self._api_key = api_key
+        self._model = None
+        self._instructed_models = {}  # system instruction -> InstructedModel
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self._api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    # Model bound to a system instruction, built once per distinct instruction
+    def model_for(self, system_instruction=None):
+        if not system_instruction:
+            return self.model
+        instructed = self._instructed_models.get(system_instruction)
+        if instructed is None:
+            self.model  # make sure the SDK is configured
+            with self._lock:
+                instructed = self._instructed_models.get(system_instruction)
+                if instructed is None:
+                    import google.generativeai as genai
+                    instructed = InstructedModel(
+                        genai.GenerativeModel(self.model_name, system_instruction=system_instruction),
+                        system_instruction
+                    )
+                    self._instructed_models[system_instruction] = instructed
+        return instructed
+
+    def check_health(self):
+        try:
+            import google.generativeai as genai
+            self.model  # make sure the SDK is configured
+            genai.get_model(self.model_name, request_options={"timeout": 10})
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e)
+        else:
+            self.healthy = True
+            self.last_error = None
+        self._checked_at = time.monotonic()
+        return self.healthy
+
+    def is_healthy(self):
+        if self.closed:
+            return False
+        if self._model is not None and time.monotonic() - self._checked_at >= self.health_check_interval:
+            self.check_health()
+        return self.healthy
+
+    def close(self):
+        self.closed = True
+
+
+# A Gemini model bound to a system instruction. The instruction travels in the request's
+# system field instead of being pasted into every prompt; it is part of the response cache
+# key and the token estimate like the prompt itself.
+class InstructedModel:
+    def __init__(self, model, system_instruction):
+        self._model = model
+        self.model_name = model.model_name
+        self.system_instruction = system_instruction
+
+    def generate_content(self, *args, **kwargs):
+        return self._model.generate_content(*args, **kwargs)
+
+
+# Persistent, content-addressed cache for Gemini responses.
+# Entries live on disk as one JSON file per key; an in-memory LRU index keeps
+# eviction cheap, and file mtimes record last access so LRU order survives restarts.
+class ResponseCache:
+    def __init__(self, directory, max_entries=1000, max_bytes=100 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(model_name, prompt, settings=None, system_instruction=None):
+        parts = [model_name, prompt, settings or {}]
+        if system_instruction:
+            parts.append(system_instruction)
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def _load_index(self):
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def _drop(self, key):
+        size = self._index.pop(key, 0)
+        self._total_bytes -= size
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._drop(key)
+                self.misses += 1
+                return None
+            if self.ttl and time.time() - entry.get("created_at", 0) > self.ttl:
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return entry["text"]
+
+    def set(self, key, text):
+        data = json.dumps({"created_at": time.time(), "text": text}).encode("utf-8")
+        with self._lock:
+            path = self._path(key)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._index and (len(self._index) > self.max_entries or self._total_bytes > self.max_bytes):
+            oldest = next(iter(self._index))
+            self._drop(oldest)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._drop(key)
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._index),
+                "bytes": self._total_bytes
+            }
+
+
+# Function to estimate the tokens/min budget of a call: prompt and system instruction plus the output allowance
+def estimate_request_tokens(prompt, generation_config=None, system_instruction=None):
+    if isinstance(generation_config, dict):
+        max_output = generation_config.get("max_output_tokens")
+    else:
+        max_output = getattr(generation_config, "max_output_tokens", None)
+    prompt_tokens = estimate_tokens(prompt) + (estimate_tokens(system_instruction) if system_instruction else 0)
+    return prompt_tokens + (max_output or DEFAULT_OUTPUT_TOKENS)
+
+
+# Function to read the actual token usage reported with a response, if any
+def response_token_count(response):
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None) or None
+
+
+# Function to call Gemini through the response cache.
+# The cache key covers the model name, the fully rendered prompt and the generation
+# settings; transport options such as timeouts are deliberately left out of the key.
+# With a scheduler, the call waits for rate-limit quota in the given priority lane and
+# transient failures are retried with backoff.
+# on_request() is called once the prompt is actually sent, i.e. not for cache hits.
+def generate_text(model, prompt, cache=None, generation_config=None, request_options=None, scheduler=None,
+                  priority=BULK, on_request=None):
+    system_instruction = getattr(model, "system_instruction", None)
+    key = None
+    if cache is not None:
+        key = cache.make_key(model.model_name, prompt, generation_config, system_instruction)
+        text = cache.get(key)
+        if text is not None:
+            return text
+    if on_request is not None:
+        on_request()
+
+    estimated_tokens = estimate_request_tokens(prompt, generation_config, system_instruction)
+
+    def request():
+        response = model.generate_content(
+            prompt,
+            generation_config=generation_config,
+            request_options=request_options
+        )
+        if scheduler is not None:
+            scheduler.settle(estimated_tokens, response_token_count(response))
+        return response.text
+
+    text = scheduler.call(request, estimated_tokens, priority) if scheduler is not None else request()
+    if cache is not None and text:
+        cache.set(key, text)
+    return text
+
+
+# Function to stream Gemini output through the response cache.
+# Yields text chunks as they arrive; a cache hit is yielded as a single chunk and a
+# completed stream is stored so the next identical request returns instantly.
+# With a scheduler, failures before the first chunk are retried; once output has been
+# yielded an error is raised to the caller. on_request() is called as in generate_text.
+def stream_text(model, prompt, cache=None, generation_config=None, request_options=None, scheduler=None,
+                priority=BULK, on_request=None):
+    system_instruction = getattr(model, "system_instruction", None)
+    key = None
+    if cache is not None:
+        key = cache.make_key(model.model_name, prompt, generation_config, system_instruction)
+        text = cache.get(key)
+        if text is not None:
+            yield text
+            return
+    if on_request is not None:
+        on_request()
+
+    estimated_tokens = estimate_request_tokens(prompt, generation_config, system_instruction)
+    chunks = []
+    attempt = 0
+    while True:
+        if scheduler is not None:
+            scheduler.acquire(estimated_tokens, priority)
+        try:
+            response = model.generate_content(
+                prompt,
+                generation_config=generation_config,
+                request_options=request_options,
+                stream=True
+            )
+            for chunk in response:
+                try:
+                    chunk_text = chunk.text
+                except ValueError:
+                    # Chunks carrying only finish metadata have no text parts
+                    continue
+                if chunk_text:
+                    chunks.append(chunk_text)
+                    yield chunk_text
+            break
+        except Exception as e:
+            delay = scheduler.backoff(attempt, e) if scheduler is not None and not chunks else None
+            if delay is None:
+                raise
+            attempt += 1
+            time.sleep(delay)
+    if scheduler is not None:
+        scheduler.settle(estimated_tokens, response_token_count(response))
+    text = "".join(chunks)
+    if cache is not None and text:
+        cache.set(key, text)
@@ -0,0 +1,165 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+INTERRUPTED = "interrupted"  # was still running when the process stopped
+FINISHED_STATUSES = frozenset({DONE, FAILED, INTERRUPTED})
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    kind: str
+    label: str
+    params: dict = field(default_factory=dict)
+    status: str = QUEUED
+    done: int = 0
+    total: int = 0
+    result_count: int = 0
+    errors: list = field(default_factory=list)
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "label": self.label,
+            "params": self.params,
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+            "result_count": self.result_count,
+            "errors": list(self.errors),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+
+# Handle passed to a running job function for reporting progress from its worker thread.
+# Results must be JSON-serialisable; they are appended in order and never modified.
+class JobContext:
+    def __init__(self, queue, job_id):
+        self._queue = queue
+        self.job_id = job_id
+
+    def progress(self, done, total):
+        self._queue._update(self.job_id, done=done, total=total)
+
+    def add_result(self, result):
+        self._queue._add_result(self.job_id, result)
+
+    def add_error(self, message):
+        self._queue._add_error(self.job_id, str(message))
+
+
+# Background job queue shared by all sessions.
+# Job functions run on a small thread pool, independent of any Streamlit script run, so
+# navigation and widget interaction never interrupt them. Status, progress and partial
+# results are kept in memory for polling and written through to the store so they
+# survive restarts; jobs that were running when the process stopped come back as
+# interrupted.
+class JobQueue:
+    def __init__(self, store=None, max_workers=2, max_finished_in_memory=50, retention=7 * 24 * 3600):
+        self._store = store
+        self.max_finished_in_memory = max_finished_in_memory
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._results = {}
+        if store is not None:
+            store.interrupt_unfinished_jobs(INTERRUPTED, sorted(FINISHED_STATUSES))
+            store.delete_jobs_before(time.time() - retention)
+
+    # Queue fn(context, *args) and return the new job's ID
+    def submit(self, kind, label, fn, *args, params=None, **kwargs):
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, kind=kind, label=label, params=params or {}, created_at=now, updated_at=now)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            self._results[job.id] = []
+            self._persist(job)
+        self._executor.submit(self._run, job.id, fn, args, kwargs)
+        return job.id
+
+    # Drop the oldest finished jobs from memory; they remain readable from the store
+    def _prune(self):
+        finished = sorted((job.updated_at, job_id) for job_id, job in self._jobs.items() if job.finished)
+        for _, job_id in finished[:max(0, len(finished) - self.max_finished_in_memory)]:
+            del self._jobs[job_id]
+            del self._results[job_id]
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status=RUNNING)
+        try:
+            fn(JobContext(self, job_id), *args, **kwargs)
+        except Exception as e:
+            self._add_error(job_id, str(e))
+            self._update(job_id, status=FAILED)
+        else:
+            self._update(job_id, status=DONE)
+
+    def _persist(self, job):
+        if self._store is not None:
+            self._store.save_job(job.to_dict())
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.updated_at = time.time()
+            self._persist(job)
+
+    def _add_result(self, job_id, result):
+        with self._lock:
+            job = self._jobs[job_id]
+            seq = len(self._results[job_id])
+            self._results[job_id].append(result)
+            job.result_count = seq + 1
+            job.updated_at = time.time()
+            if self._store is not None:
+                self._store.append_job_result(job_id, seq, result)
+            self._persist(job)
+
+    def _add_error(self, job_id, message):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.errors.append(message)
+            job.updated_at = time.time()
+            self._persist(job)
+
+    # Snapshot of a job, falling back to the store for jobs from an earlier process
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return Job(**{**job.to_dict(), "params": dict(job.params)})
+        if self._store is not None:
+            data = self._store.load_job(job_id)
+            if data is not None:
+                return Job(**data)
+        return None
+
+    # Results appended since index start
+    def results(self, job_id, start=0):
+        with self._lock:
+            if job_id in self._results:
+                return self._results[job_id][start:]
+        if self._store is not None:
+            return self._store.load_job_results(job_id, start)
+        return []
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+from gemini_client import GeminiClient
+from request_scheduler import estimate_tokens
+
+# Model backends the app can run against (MODEL_BACKEND). Every backend provides the client
+# interface of GeminiClient: model_name, model, model_for(system_instruction), check_health(),
+# is_healthy(), close() and the healthy / last_error / closed attributes. Models expose
+# model_name and generate_content(prompt, generation_config=None, request_options=None,
+# stream=False), returning a response with .text and .usage_metadata (iterable when streamed).
+GEMINI = "gemini"
+FAKE = "fake"
+
+NUM_CASES_PATTERN = re.compile(r'Generate (\d+) comprehensive test cases')
+TITLE_PATTERN = re.compile(r'^Title: (.+)$', re.M)
+SUITE_FILE_PATTERN = re.compile(r'src/test/java/com/qa/tests/(\w+)\.java')
+WORD_PATTERN = re.compile(r'[A-Za-z0-9]+')
+FAKE_ACTIONS = ("submit valid details", "reject invalid input", "show a confirmation message",
+                "keep data after refresh", "handle an empty form", "enforce field limits")
+
+
+# Function to build a Java identifier from free text ("Login works" -> LoginWorks)
+def java_identifier(text, suffix=""):
+    words = WORD_PATTERN.findall(text)[:8] or ["Generated"]
+    identifier = "".join(word[:1].upper() + word[1:] for word in words) + suffix
+    return identifier if identifier[0].isalpha() else f"T{identifier}"
+
+
+# Function to synthesise a test case generation response for a prompt
+def fake_test_cases_response(prompt, rng):
+    match = NUM_CASES_PATTERN.search(prompt)
+    num_cases = int(match.group(1)) if match else 5
+    words = sorted({word.lower() for word in WORD_PATTERN.findall(prompt) if len(word) > 5 and word.isalpha()})
+    words = words or ["feature"]
+    cases = []
+    for idx in range(1, num_cases + 1):
+        feature = rng.choice(words)
+        action = rng.choice(FAKE_ACTIONS)
+        cases.append({
+            "id": f"TC_{idx:03d}",
+            "title": f"Verify {feature} pages {action} (scenario {idx})",
+            "preconditions": [f"User is on the {feature.title()} page"],
+            "test_data": [f"{feature}_value_{rng.randint(1, 999)}"],
+            "test_steps": [f"Open the {feature.title()} page", f"Perform the action to {action}", "Observe the result"],
+            "expected_results": [f"The {feature} page must {action}"],
+            "priority": rng.choice(("High", "Medium", "Low")),
+            "attachments": []
+        })
+    return "```json\n" + json.dumps({"test_cases": cases}, indent=2) + "\n```"
+
+
+# Function to synthesise automation code (a Page Object and a test class) for a prompt
+def fake_automation_response(prompt, rng):
+    titles = [title.strip() for title in TITLE_PATTERN.findall(prompt)] or ["Generated scenario"]
+    suite = SUITE_FILE_PATTERN.search(prompt)
+    class_name = suite.group(1) if suite else java_identifier(titles[0], "Test")
+    page_words = [word for word in WORD_PATTERN.findall(titles[0].replace("Verify", "")) if word.isalpha()]
+    page_name = java_identifier(page_words[0] if page_words else "Home", "Page")
+    locators = "\n".join(
+        f'    @FindBy(id = "{page_name[:-4].lower()}-field-{idx}")\n    private WebElement field{idx};\n'
+        for idx in range(1, rng.randint(3, 6))
+    )
+    test_methods = "\n".join(
+        f"    @Test(description = \"{title}\")\n"
+        f"    public void test{java_identifier(title)}{idx}() {{\n"
+        f"        {page_name} page = new {page_name}(getDriver());\n"
+        f"        page.open();\n"
+        f"        Assert.assertTrue(page.isLoaded(), \"{page_name} should load\");\n"
+        f"    }}\n"
+        for idx, title in enumerate(titles, start=1)
+    )
+    return (
+        f"// FILE: src/main/java/com/qa/pages/{page_name}.java\n"
+        f"package com.qa.pages;\n\n"
+        f"import org.openqa.selenium.WebDriver;\n"
+        f"import org.openqa.selenium.WebElement;\n"
+        f"import org.openqa.selenium.support.FindBy;\n"
+        f"import org.openqa.selenium.support.PageFactory;\n\n"
+        f"public class {page_name} {{\n"
+        f"    private final WebDriver driver;\n\n"
+        f"{locators}\n"
+        f"    public {page_name}(WebDriver driver) {{\n"
+        f"        this.driver = driver;\n"
+        f"        PageFactory.initElements(driver, this);\n"
+        f"    }}\n\n"
+        f"    public void open() {{\n"
+        f"        field1.click();\n"
+        f"    }}\n\n"
+        f"    public boolean isLoaded() {{\n"
+        f"        return field1.isDisplayed();\n"
+        f"    }}\n"
+        f"}}\n\n"
+        f"// FILE: src/test/java/com/qa/tests/{class_name}.java\n"
+        f"package com.qa.tests;\n\n"
+        f"import com.qa.base.BaseTest;\n"
+        f"import com.qa.pages.{page_name};\n"
+        f"import org.testng.Assert;\n"
+        f"import org.testng.annotations.Test;\n\n"
+        f"public class {class_name} extends BaseTest {{\n"
+        f"{test_methods}"
+        f"}}\n"
+    )
+
+
+class FakeUsage:
+    def __init__(self, total_token_count):
+        self.total_token_count = total_token_count
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+# Response of the fake model; iterating it streams the text in chunks spread over the latency
+class FakeResponse:
+    def __init__(self, text, total_tokens, latency=0.0, chunk_chars=200):
+        self.text = text
+        self.usage_metadata = FakeUsage(total_tokens)
+        self._latency = latency
+        self._chunk_chars = chunk_chars
+
+    def __iter__(self):
+        chunks = [self.text[i:i + self._chunk_chars] for i in range(0, len(self.text), self._chunk_chars)]
+        for chunk in chunks:
+            time.sleep(self._latency / len(chunks))
+            yield FakeChunk(chunk)
+
+
+# Offline stand-in for a Gemini model. Responses are synthesised from the prompt (test case
+# JSON or "// FILE:" Java blocks) and seeded by its hash, so identical prompts always get
+# identical output; each call takes latency seconds.
+class FakeModel:
+    def __init__(self, model_name, latency=0.0, chunk_chars=200, system_instruction=None):
+        self.model_name = model_name
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.system_instruction = system_instruction
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, request_options=None, stream=False):
+        with self._lock:
+            self.calls += 1
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        if '"test_cases"' in prompt:
+            text = fake_test_cases_response(prompt, rng)
+        else:
+            text = fake_automation_response(prompt, rng)
+        total_tokens = estimate_tokens(prompt) + estimate_tokens(text)
+        if self.system_instruction:
+            total_tokens += estimate_tokens(self.system_instruction)
+        if stream:
+            return FakeResponse(text, total_tokens, self.latency, self.chunk_chars)
+        time.sleep(self.latency)
+        return FakeResponse(text, total_tokens)
+
+
+# Client for the fake backend, with the same interface as GeminiClient. The model name is
+# prefixed with "fake-" so its responses never share response cache entries with real ones.
+class FakeClient:
+    def __init__(self, model_name="gemini-1.5-flash", latency=0.0, chunk_chars=200):
+        model_name = model_name.rsplit("/", 1)[-1]
+        self.model_name = f"models/fake-{model_name}"
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.healthy = True
+        self.last_error = None
+        self.closed = False
+        self._lock = threading.Lock()
+        self._models = {}  # system instruction -> FakeModel
+
+    @property
+    def model(self):
+        return self.model_for(None)
+
+    def model_for(self, system_instruction=None):
+        with self._lock:
+            model = self._models.get(system_instruction)
+            if model is None:
+                model = FakeModel(self.model_name, self.latency, self.chunk_chars, system_instruction)
+                self._models[system_instruction] = model
+            return model
+
+    def check_health(self):
+        return self.healthy
+
+    def is_healthy(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+# Function to create the client for a model backend
+def create_model_client(backend, api_key=None, model_name="gemini-1.5-flash", latency=0.0):
+    if backend == GEMINI:
+        return GeminiClient(api_key, model_name)
+    if backend == FAKE:
+        return FakeClient(model_name, latency=latency)
+    raise ValueError(f"Unknown model backend: {backend}")
@@ -0,0 +1,286 @@
+from dataclasses import asdict, dataclass, field
+
+from search_index import TestCaseSearchIndex
+
+PRIORITIES = ("High", "Medium", "Low")
+LIST_FIELDS = ("preconditions", "test_data", "test_steps", "expected_results")
+# Number of cases materialised per loader call when iterating a lazily loaded collection
+LOAD_BATCH_SIZE = 500
+
+
+# Function to coerce a JSON value into a clean list of non-empty strings
+def _string_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split("\n")
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    return [str(item).strip() for item in value if item is not None and str(item).strip()]
+
+
+# A single test case. Slots keep per-instance memory small for sessions with thousands of cases.
+@dataclass(slots=True)
+class TestCase:
+    id: str
+    title: str
+    preconditions: list = field(default_factory=list)
+    test_data: list = field(default_factory=list)
+    test_steps: list = field(default_factory=list)
+    expected_results: list = field(default_factory=list)
+    priority: str = "Medium"
+    attachments: list = field(default_factory=list)
+    duplicate_of: str = None
+
+    # Validated construction from a dict (e.g. one entry of Gemini's "test_cases" JSON).
+    # Raises ValueError when the entry cannot be a usable test case.
+    @classmethod
+    def from_dict(cls, data, default_priority="Medium"):
+        if not isinstance(data, dict):
+            raise ValueError(f"Test case must be an object, got {type(data).__name__}")
+        title = str(data.get("title") or "").strip()
+        if not title:
+            raise ValueError("Test case is missing a title")
+        lists = {name: _string_list(data.get(name)) for name in LIST_FIELDS}
+        if not lists["test_steps"]:
+            raise ValueError(f"Test case '{title}' has no test steps")
+        priority = str(data.get("priority") or "").strip().capitalize()
+        if priority not in PRIORITIES:
+            priority = default_priority
+        attachments = data.get("attachments") or []
+        return cls(
+            id=str(data.get("id") or "").strip(),
+            title=title,
+            priority=priority,
+            attachments=list(attachments) if isinstance(attachments, list) else [],
+            duplicate_of=data.get("duplicate_of"),
+            **lists
+        )
+
+    def to_dict(self):
+        return asdict(self)
+
+
+# Ordered collection of test cases with selection tracked alongside it.
+# Case IDs are kept in a list with an id -> position index and priorities in a parallel
+# column, while full TestCase objects are materialised on demand through an optional
+# loader (e.g. from the SQLite store), so a large persisted collection only loads the
+# cases that are actually shown. Selection is a set of ids with a running count, so
+# lookups, selection toggles and counts are O(1).
+# version changes on every content mutation so derived views (filters, indexes) can be
+# cached; the full-text search index is built on first use and then updated incrementally,
+# and added/edited/deleted IDs are tracked until drain_changes() hands them to the store.
+class TestCaseCollection:
+    __slots__ = ("_ids", "_positions", "_cases", "_priorities", "_selected", "_version",
+                 "_loader", "_search_index", "_added", "_dirty", "_deleted")
+
+    # index: (id, priority) rows for cases that live in a backing store and are loaded
+    # lazily via loader(ids) -> {id: TestCase}
+    def __init__(self, test_cases=(), index=(), loader=None):
+        self._ids = []
+        self._positions = {}
+        self._cases = {}
+        self._priorities = {}
+        self._selected = set()
+        self._version = 0
+        self._loader = loader
+        self._search_index = None
+        self._added = set()  # not in the store yet
+        self._dirty = set()
+        self._deleted = set()
+        for case_id, priority in index:
+            self._positions[case_id] = len(self._ids)
+            self._ids.append(case_id)
+            self._priorities[case_id] = priority
+        self.extend(test_cases)
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            search_index = TestCaseSearchIndex()
+            for test_case in self:
+                search_index.add(test_case)
+            self._search_index = search_index
+        return self._search_index
+
+    def _materialize(self, case_ids):
+        missing = [case_id for case_id in case_ids if case_id not in self._cases]
+        if missing and self._loader is not None:
+            self._cases.update(self._loader(missing))
+
+    # Mark a case as changed after it was modified in place
+    def touch(self, case_id=None):
+        self._version += 1
+        if case_id in self._positions:
+            if case_id not in self._added:
+                self._dirty.add(case_id)
+            if self._search_index is not None:
+                self._search_index.add(self.get(case_id))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __bool__(self):
+        return bool(self._ids)
+
+    def __iter__(self):
+        for start in range(0, len(self._ids), LOAD_BATCH_SIZE):
+            batch = self._ids[start:start + LOAD_BATCH_SIZE]
+            self._materialize(batch)
+            for case_id in batch:
+                yield self._cases[case_id]
+
+    def __getitem__(self, index):
+        return self.get(self._ids[index])
+
+    def __contains__(self, case_id):
+        return case_id in self._positions
+
+    def ids(self):
+        return iter(self._ids)
+
+    def priority(self, case_id):
+        return self._priorities[case_id]
+
+    def get(self, case_id):
+        if case_id not in self._positions:
+            return None
+        self._materialize([case_id])
+        return self._cases[case_id]
+
+    def get_many(self, case_ids):
+        case_ids = [case_id for case_id in case_ids if case_id in self._positions]
+        self._materialize(case_ids)
+        return [self._cases[case_id] for case_id in case_ids]
+
+    def index_of(self, case_id):
+        return self._positions[case_id]
+
+    def append(self, test_case):
+        if test_case.id in self._positions:
+            raise ValueError(f"Duplicate test case ID: {test_case.id}")
+        self._positions[test_case.id] = len(self._ids)
+        self._ids.append(test_case.id)
+        self._cases[test_case.id] = test_case
+        self._priorities[test_case.id] = test_case.priority
+        self._version += 1
+        self._added.add(test_case.id)
+        if self._search_index is not None:
+            self._search_index.add(test_case)
+
+    def extend(self, test_cases):
+        for test_case in test_cases:
+            self.append(test_case)
+
+    # Replace a case in place (e.g. after editing), keeping its position and selection
+    def replace(self, case_id, test_case):
+        position = self._positions.pop(case_id)
+        self._positions[test_case.id] = position
+        self._ids[position] = test_case.id
+        self._cases.pop(case_id, None)
+        self._priorities.pop(case_id, None)
+        self._cases[test_case.id] = test_case
+        self._priorities[test_case.id] = test_case.priority
+        self._version += 1
+        if case_id == test_case.id:
+            if case_id not in self._added:
+                self._dirty.add(case_id)
+        else:
+            # A new ID is stored as a new case, so it cannot overwrite another session's case
+            self._added.add(test_case.id)
+            self._dirty.discard(case_id)
+            if case_id in self._added:
+                self._added.discard(case_id)
+            else:
+                self._deleted.add(case_id)
+            if case_id in self._selected:
+                self._selected.discard(case_id)
+                self._selected.add(test_case.id)
+        if self._search_index is not None:
+            self._search_index.remove(case_id)
+            self._search_index.add(test_case)
+
+    def remove(self, case_ids):
+        case_ids = set(case_ids) & self._positions.keys()
+        if not case_ids:
+            return 0
+        self._ids = [case_id for case_id in self._ids if case_id not in case_ids]
+        self._positions = {case_id: position for position, case_id in enumerate(self._ids)}
+        for case_id in case_ids:
+            self._cases.pop(case_id, None)
+            self._priorities.pop(case_id, None)
+            if self._search_index is not None:
+                self._search_index.remove(case_id)
+        self._selected -= case_ids
+        self._dirty -= case_ids
+        self._deleted |= case_ids - self._added
+        self._added -= case_ids
+        self._version += 1
+        return len(case_ids)
+
+    def remove_selected(self):
+        return self.remove(self._selected)
+
+    # Returns (added test cases, edited test cases, deleted IDs) since the last call,
+    # cases in collection order
+    def drain_changes(self):
+        added = [self._cases[case_id] for case_id in sorted(self._added, key=self._positions.get)]
+        edited = [self._cases[case_id] for case_id in sorted(self._dirty, key=self._positions.get)]
+        deleted = list(self._deleted)
+        self._added = set()
+        self._dirty = set()
+        self._deleted = set()
+        return added, edited, deleted
+
+    # Rename a case the store has already saved under another ID (no change is recorded)
+    def reassign_id(self, case_id, new_id):
+        if case_id not in self._positions:
+            return
+        test_case = self.get(case_id)
+        test_case.id = new_id
+        position = self._positions.pop(case_id)
+        self._positions[new_id] = position
+        self._ids[position] = new_id
+        self._cases[new_id] = self._cases.pop(case_id)
+        self._priorities[new_id] = self._priorities.pop(case_id)
+        if case_id in self._selected:
+            self._selected.discard(case_id)
+            self._selected.add(new_id)
+        self._version += 1
+        if self._search_index is not None:
+            self._search_index.remove(case_id)
+            self._search_index.add(test_case)
+
+    def is_selected(self, case_id):
+        return case_id in self._selected
+
+    def set_selected(self, case_id, selected):
+        if selected and case_id in self._positions:
+            self._selected.add(case_id)
+        else:
+            self._selected.discard(case_id)
+
+    def select_all(self, selected=True):
+        self._selected = set(self._positions) if selected else set()
+
+    @property
+    def selected_count(self):
+        return len(self._selected)
+
+    @property
+    def all_selected(self):
+        return bool(self._ids) and len(self._selected) == len(self._ids)
+
+    # Case IDs matching query, best match first; every case when the query has no search terms
+    def search(self, query, limit=None):
+        ranked = self.search_index.search(query, limit)
+        if ranked is None:
+            return self._ids[:limit] if limit else list(self._ids)
+        return ranked
+
+    def selected(self):
+        return self.get_many(sorted(self._selected, key=self._positions.get))
@@ -0,0 +1,161 @@
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from code_artifacts import merge_java_sources
+from prompt_budget import fit_ranked_lines
+from project_assembler import java_class_name, java_package
+
+# Locators declared with @FindBy(id = "...") or built with By.id("...")
+LOCATOR_PATTERN = re.compile(
+    r'@FindBy\s*\(\s*(\w+)\s*=\s*"((?:[^"\\]|\\.)*)"|\bBy\.(\w+)\s*\(\s*"((?:[^"\\]|\\.)*)"'
+)
+PUBLIC_METHOD_PATTERN = re.compile(r'\bpublic\s+(?:static\s+)?(?:final\s+)?([\w<>\[\],.? ]+?)\s+(\w+)\s*\(([^)]*)\)')
+CAMEL_CASE_WORD_PATTERN = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+')
+# @FindBy attribute names that differ from the matching By method (lowercased)
+LOCATOR_STRATEGY_ALIASES = {"css": "cssselector"}
+
+# Classes with different names are the same page when their locators overlap at least this much
+SIGNATURE_SIMILARITY_THRESHOLD = 0.6
+MIN_SIGNATURE_LOCATORS = 2
+# Page Objects listed in a prompt, most relevant first
+MAX_CONTEXT_PAGE_OBJECTS = 12
+
+
+# Function to compute a class's locator signature: the set of (strategy, value) locators it declares
+def locator_signature(source):
+    signature = set()
+    for match in LOCATOR_PATTERN.finditer(source):
+        strategy = (match.group(1) or match.group(3)).lower()
+        value = match.group(2) if match.group(1) else match.group(4)
+        signature.add((LOCATOR_STRATEGY_ALIASES.get(strategy, strategy), value))
+    return frozenset(signature)
+
+
+# Function to decide whether a generated Java file is a Page Object
+def is_page_object(file_name, class_name):
+    return "/pages/" in file_name.replace("\\", "/") or class_name.endswith("Page")
+
+
+# Function to split a class name into lowercase words (LoginPage -> login, page)
+def class_name_words(class_name):
+    return {word.lower() for word in CAMEL_CASE_WORD_PATTERN.findall(class_name)}
+
+
+@dataclass(slots=True)
+class PageObject:
+    class_name: str
+    path: str
+    source: str
+    signature: frozenset
+
+    # Public methods as compact signatures, so a prompt can list them without the bodies
+    def method_signatures(self):
+        return [
+            f"{return_type.strip()} {name}({' '.join(params.split())})"
+            for return_type, name, params in PUBLIC_METHOD_PATTERN.findall(self.source)
+            if name != self.class_name and return_type.strip() not in {"class", "interface", "enum", "record"}
+        ]
+
+    @property
+    def qualified_name(self):
+        package = java_package(self.source)
+        return f"{package}.{self.class_name}" if package else self.class_name
+
+
+# Registry of the Page Objects generated so far, keyed by class name.
+# Every generated file map is registered: Page Objects are merged member by member into one
+# canonical class per page, and classes that only differ in name from a registered page (same
+# locators) are folded into it, with references renamed. Registered pages are listed in later
+# prompts so the model reuses them and only emits new members. Thread-safe; shared by the
+# worker threads of a generation job.
+class PageObjectRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pages)
+
+    def _match(self, class_name, signature):
+        if class_name in self._pages:
+            return class_name
+        if len(signature) < MIN_SIGNATURE_LOCATORS:
+            return None
+        best_name, best_score = None, 0.0
+        for page in self._pages.values():
+            if len(page.signature) < MIN_SIGNATURE_LOCATORS:
+                continue
+            score = len(signature & page.signature) / len(signature | page.signature)
+            if score > best_score:
+                best_name, best_score = page.class_name, score
+        return best_name if best_score >= SIGNATURE_SIMILARITY_THRESHOLD else None
+
+    # Register the Page Objects in a generated file map. Returns the file map with its Page
+    # Objects replaced by the canonical classes, plus every registered page it refers to, so
+    # each generation stays self-contained even when the model only emitted new members.
+    def register(self, files):
+        with self._lock:
+            renames = {}
+            page_files = set()
+            for file_name, content in files.items():
+                if not file_name.endswith(".java"):
+                    continue
+                class_name = java_class_name(content) or Path(file_name).stem
+                if not is_page_object(file_name, class_name):
+                    continue
+                page_files.add(file_name)
+                signature = locator_signature(content)
+                existing = self._match(class_name, signature)
+                if existing is None:
+                    self._pages[class_name] = PageObject(class_name, file_name, content, signature)
+                    continue
+                if existing != class_name:
+                    renames[class_name] = existing
+                    content = re.sub(rf'\b{class_name}\b', existing, content)
+                page = self._pages[existing]
+                page.source = merge_java_sources(page.source, content)
+                page.signature = locator_signature(page.source)
+
+            resolved = {}
+            for file_name, content in files.items():
+                if file_name in page_files:
+                    continue
+                for old_name, new_name in renames.items():
+                    content = re.sub(rf'\b{old_name}\b', new_name, content)
+                resolved[file_name] = content
+
+            # Add the canonical version of every page referenced, following page-to-page references
+            pending = list(resolved.values()) + [page.source for page in self._pages.values()
+                                                 if page.path in page_files]
+            included = set()
+            while pending:
+                text = pending.pop()
+                for page in self._pages.values():
+                    if page.class_name not in included and re.search(rf'\b{page.class_name}\b', text):
+                        included.add(page.class_name)
+                        resolved[page.path] = page.source
+                        pending.append(page.source)
+            return resolved
+
+    # Prompt section listing the registered Page Objects (most relevant to tokens first), or "".
+    # With budget_tokens, only the most relevant pages that fit the budget are listed.
+    def prompt_context(self, tokens=(), limit=MAX_CONTEXT_PAGE_OBJECTS, budget_tokens=None):
+        tokens = set(tokens)
+        with self._lock:
+            pages = list(self._pages.values())
+            if not pages:
+                return ""
+            ranked = sorted(pages, key=lambda page: -len(class_name_words(page.class_name) & tokens))[:limit]
+            lines = [
+                f"- {page.qualified_name}: {', '.join(page.method_signatures()) or 'no public methods'}"
+                for page in ranked
+            ]
+        lines = fit_ranked_lines(lines, budget_tokens)
+        return (
+            "These Page Objects already exist. Reuse them (import them and call their methods) instead of "
+            "redefining them. Only output an existing Page Object if you need new locators or methods, and "
+            "then include only the new members:\n" + "\n".join(lines)
+        )
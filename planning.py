@@ -0,0 +1,171 @@
+import re
+
+from search_index import tokenize
+
+
+# Map-reduce settings for large requirement documents
+MAX_CASES_PER_CALL = 10
+MAX_SECTION_CHARS = 6000
+NON_ALPHANUMERIC_PATTERN = re.compile(r'[^a-z0-9]+')
+SECTION_HEADING_PATTERN = re.compile(r'^\s*(#{1,6}\s+\S|\d+(\.\d+)*[.)]?\s+[A-Z]|[A-Z][A-Z0-9 /&-]{3,}:?\s*$)')
+
+
+# Function to split requirements into sections of at most max_chars characters.
+# Paragraphs are kept whole where possible and headings start a new section once
+# the current one is reasonably full.
+def split_requirements(text, max_chars=MAX_SECTION_CHARS):
+    blocks = []
+    current = []
+    for line in text.splitlines():
+        if not line.strip() or (SECTION_HEADING_PATTERN.match(line) and current):
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            if not line.strip():
+                continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+
+    sections = []
+    section = []
+    section_len = 0
+    for block in blocks:
+        # Hard-split blocks that are larger than a whole section
+        pieces = [block[i:i + max_chars] for i in range(0, len(block), max_chars)]
+        for piece in pieces:
+            starts_heading = SECTION_HEADING_PATTERN.match(piece) is not None
+            if section and (section_len + len(piece) > max_chars or (starts_heading and section_len >= max_chars // 2)):
+                sections.append("\n\n".join(section))
+                section = []
+                section_len = 0
+            section.append(piece)
+            section_len += len(piece) + 2
+    if section:
+        sections.append("\n\n".join(section))
+    return sections
+
+
+# Function to pick count of the sections, in document order, when there are more sections
+# than test cases: the sections are divided into count contiguous runs and the largest
+# section of each run is kept, so the cases are spread over the whole document. The other
+# sections are not sent (see plan_coverage). Returns (position, section) pairs.
+def sample_sections(sections, count):
+    picked = []
+    for run in range(count):
+        start, end = run * len(sections) // count, (run + 1) * len(sections) // count
+        best = max(range(start, end), key=lambda i: len(sections[i]))
+        picked.append((best, sections[best]))
+    return picked
+
+
+# Function to report how much of the requirements plan_test_case_generation sends for
+# num_cases cases, as (sections sent, total sections, share of the text sent)
+def plan_coverage(text, num_cases, max_chars=MAX_SECTION_CHARS):
+    all_sections = split_requirements(text, max_chars)
+    if not all_sections or num_cases >= len(all_sections):
+        return len(all_sections), len(all_sections), 1.0
+    picked = [section for _, section in sample_sections(all_sections, max(1, num_cases))]
+    return len(picked), len(all_sections), sum(map(len, picked)) / sum(map(len, all_sections))
+
+
+# Function to plan per-section generation tasks as (section_text, num_cases, note) tuples.
+# Sections stay within max_chars and every call is asked for at least one case: with more
+# sections than cases, a sample of the sections is used (see sample_sections). Case counts
+# are spread proportionally to section size and no single call is asked for more than
+# MAX_CASES_PER_CALL cases, so responses stay well within output limits.
+def plan_test_case_generation(text, num_cases, max_chars=MAX_SECTION_CHARS):
+    all_sections = split_requirements(text, max_chars)
+    if not all_sections or num_cases < 1:
+        return []
+    if len(all_sections) > num_cases:
+        positions, sections = zip(*sample_sections(all_sections, num_cases))
+    else:
+        positions, sections = range(len(all_sections)), all_sections
+
+    sizes = [len(section) for section in sections]
+    total_size = sum(sizes)
+    spare = num_cases - len(sections)
+    shares = [size * spare / total_size for size in sizes]
+    counts = [1 + int(share) for share in shares]
+    remainders = sorted(range(len(sections)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    for i in remainders[:num_cases - sum(counts)]:
+        counts[i] += 1
+
+    tasks = []
+    for idx, section, count in zip(positions, sections, counts):
+        batches = -(-count // MAX_CASES_PER_CALL)
+        for batch in range(batches):
+            batch_count = count // batches + (1 if batch < count % batches else 0)
+            note = f"(Requirements section {idx + 1} of {len(all_sections)}"
+            if batches > 1:
+                note += f", batch {batch + 1} of {batches}: cover scenarios distinct from the other batches"
+            note += ". Only write test cases for this section.)"
+            tasks.append((section, batch_count, note))
+    return tasks
+
+
+# Function to normalise a test case into a key used for de-duplication
+def test_case_dedup_key(test_case):
+    def normalise(value):
+        return NON_ALPHANUMERIC_PATTERN.sub(' ', str(value).lower()).strip()
+    return (normalise(test_case.title),
+            tuple(normalise(step) for step in test_case.test_steps))
+
+
+# Function to merge per-section results in document order, dropping duplicates (reduce step)
+def merge_section_test_cases(section_results, num_cases):
+    merged = []
+    seen = set()
+    for section_cases in section_results:
+        for tc in section_cases:
+            key = test_case_dedup_key(tc)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(tc)
+    return merged[:num_cases]
+
+
+# Sharding settings for large combined suites
+MAX_CASES_PER_SHARD = 8
+SHARD_SIMILARITY_THRESHOLD = 0.2
+PAGE_REFERENCE_PATTERN = re.compile(r'(\w+)\s+(?:page|screen|form|dialog|modal|tab)\b', re.I)
+
+
+# Function to derive the feature tokens used to group a test case: its title words plus
+# the pages, screens and forms its steps refer to
+def test_case_feature_tokens(test_case):
+    pages = [match.group(1) for step in test_case.test_steps for match in PAGE_REFERENCE_PATTERN.finditer(step)]
+    return set(tokenize(" ".join([test_case.title] + pages)))
+
+
+# Function to split a selection into shards of at most shard_size test cases.
+# Cases are grouped greedily by feature-token overlap (Jaccard), so cases exercising the
+# same page or feature share a call and its Page Objects; groups too small to fill a shard
+# are then packed together so the number of calls stays close to len(test_cases) / shard_size.
+def shard_test_cases(test_cases, shard_size=MAX_CASES_PER_SHARD):
+    groups = []  # [test cases, feature tokens]
+    for tc in test_cases:
+        tokens = test_case_feature_tokens(tc)
+        best, best_score = None, SHARD_SIMILARITY_THRESHOLD
+        for group in groups:
+            if len(group[0]) >= shard_size or not tokens:
+                continue
+            score = len(tokens & group[1]) / len(tokens | group[1])
+            if score >= best_score:
+                best, best_score = group, score
+        if best is None:
+            groups.append([[tc], tokens])
+        else:
+            best[0].append(tc)
+            best[1] |= tokens
+
+    shards = []
+    for cases, _ in groups:
+        target = next((shard for shard in shards if len(shard) + len(cases) <= shard_size), None)
+        if target is None:
+            shards.append(list(cases))
+        else:
+            target.extend(cases)
+    return shards
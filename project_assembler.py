@@ -0,0 +1,120 @@
+import re
+from pathlib import Path
+
+from code_artifacts import JAVA_CLASS_PATTERN, JAVA_COMMENT_PATTERN, merge_generated_files, merge_java_sources
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "project_templates"
+BASE_PACKAGE = "com.qa"
+MAVEN = "Maven"
+GRADLE = "Gradle"
+BUILD_TOOLS = (MAVEN, GRADLE)
+
+JAVA_PACKAGE_PATTERN = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.M)
+TEST_ANNOTATION_PATTERN = re.compile(r'@Test\b')
+
+# Framework skeleton: project path -> template file. Rendered locally, never generated by the model.
+SKELETON_TEMPLATES = {
+    f"src/main/java/{BASE_PACKAGE.replace('.', '/')}/config/ConfigReader.java": "ConfigReader.java",
+    f"src/main/java/{BASE_PACKAGE.replace('.', '/')}/factory/DriverFactory.java": "DriverFactory.java",
+    f"src/test/java/{BASE_PACKAGE.replace('.', '/')}/base/BaseTest.java": "BaseTest.java",
+    "src/test/resources/config.properties": "config.properties",
+    "src/test/resources/log4j2.xml": "log4j2.xml",
+    "testng.xml": "testng.xml",
+    ".gitignore": "gitignore.txt"
+}
+BUILD_TEMPLATES = {
+    MAVEN: {"pom.xml": "pom.xml"},
+    GRADLE: {"build.gradle": "build.gradle", "settings.gradle": "settings.gradle"}
+}
+
+# Told to the model so generated code builds on the skeleton instead of re-creating it
+FRAMEWORK_CONTEXT = f"""The project already contains these framework classes; import and use them, and do NOT generate them:
+- {BASE_PACKAGE}.base.BaseTest: abstract TestNG base class; opens the browser on base.url before each test and quits it after. Tests run in parallel, so call getDriver() and getWait() (WebDriverWait) in every method and never store the driver in a field; log is a Log4j2 Logger.
+- {BASE_PACKAGE}.factory.DriverFactory: thread-safe WebDriver factory; DriverFactory.getDriver() returns the current thread's driver.
+- {BASE_PACKAGE}.config.ConfigReader: configuration singleton; ConfigReader.getInstance().get("base.url")."""
+
+
+# Function to read a skeleton template and fill in its {{placeholders}}
+def render_template(template_name, **values):
+    text = (TEMPLATE_DIR / template_name).read_text(encoding="utf-8")
+    for name, value in values.items():
+        text = text.replace("{{" + name + "}}", value)
+    return text
+
+
+# Function to find the name of the top-level type declared in Java source
+def java_class_name(source):
+    match = JAVA_CLASS_PATTERN.search(JAVA_COMMENT_PATTERN.sub(" ", source))
+    return match.group(2) if match else None
+
+
+# Function to find the package declared in Java source
+def java_package(source):
+    match = JAVA_PACKAGE_PATTERN.search(JAVA_COMMENT_PATTERN.sub(" ", source))
+    return match.group(1) if match else None
+
+
+# Function to turn a free-form name into a Maven artifactId
+def artifact_id_for(name):
+    return re.sub(r'[^a-z0-9]+', "-", name.lower()).strip("-") or "generated-tests"
+
+
+# Function to merge generated file maps into one source tree keyed by Java class name.
+# Generations do not always agree on the package directory of a shared Page Object, so
+# classes with the same name are merged into the first path seen. Generated versions of
+# the framework skeleton classes are dropped in favour of the templates.
+def merge_sources_by_class(file_maps):
+    skeleton_classes = {Path(path).stem for path in SKELETON_TEMPLATES if path.endswith(".java")}
+    class_paths = {}
+    sources = {}
+    for file_name, content in merge_generated_files(file_maps).items():
+        file_name = file_name.strip().lstrip("/")
+        if not file_name.endswith(".java"):
+            if file_name not in SKELETON_TEMPLATES:
+                sources.setdefault(file_name, content)
+            continue
+        class_name = java_class_name(content) or Path(file_name).stem
+        if class_name in skeleton_classes:
+            continue
+        if class_name in class_paths:
+            path = class_paths[class_name]
+            sources[path] = merge_java_sources(sources[path], content)
+        else:
+            class_paths[class_name] = file_name
+            sources[file_name] = content
+    return sources
+
+
+# Function to list the fully qualified names of the TestNG classes in a source tree
+def find_test_classes(sources):
+    test_classes = []
+    for file_name, content in sorted(sources.items()):
+        if file_name.endswith(".java") and TEST_ANNOTATION_PATTERN.search(content):
+            class_name = java_class_name(content) or Path(file_name).stem
+            package = java_package(content)
+            test_classes.append(f"{package}.{class_name}" if package else class_name)
+    return test_classes
+
+
+# Function to assemble a ready-to-build project from per-test-case (or per-shard) file maps.
+# Generated sources are merged into one deduplicated tree and the framework skeleton (build
+# file, testng.xml, BaseTest, DriverFactory, configuration, logging) is rendered from local
+# templates, so no model call is spent on boilerplate. Returns {project path: content}.
+def assemble_project(file_maps, project_name="generated-tests", build_tool=MAVEN):
+    if build_tool not in BUILD_TEMPLATES:
+        raise ValueError(f"Unsupported build tool: {build_tool}")
+    sources = merge_sources_by_class(file_maps)
+    test_classes = find_test_classes(sources)
+    values = {
+        "group_id": BASE_PACKAGE,
+        "base_package": BASE_PACKAGE,
+        "artifact_id": artifact_id_for(project_name),
+        "suite_name": project_name,
+        "test_classes": "\n".join(f'            <class name="{name}"/>' for name in test_classes)
+    }
+
+    project = {}
+    for path, template_name in {**BUILD_TEMPLATES[build_tool], **SKELETON_TEMPLATES}.items():
+        project[path] = render_template(template_name, **values)
+    project.update(sources)
+    return dict(sorted(project.items()))
@@ -0,0 +1,41 @@
+package {{base_package}}.base;
+
+import {{base_package}}.config.ConfigReader;
+import {{base_package}}.factory.DriverFactory;
+import java.time.Duration;
+import org.apache.logging.log4j.LogManager;
+import org.apache.logging.log4j.Logger;
+import org.openqa.selenium.WebDriver;
+import org.openqa.selenium.support.ui.WebDriverWait;
+import org.testng.annotations.AfterMethod;
+import org.testng.annotations.BeforeMethod;
+
+/**
+ * Base class for all generated tests: opens a browser on the configured base URL
+ * before each test method and closes it afterwards. The driver lives in DriverFactory's
+ * ThreadLocal, so test methods can run in parallel on the same instance; always use
+ * getDriver() and getWait() instead of storing the driver in a field.
+ */
+public abstract class BaseTest {
+    protected final Logger log = LogManager.getLogger(getClass());
+
+    @BeforeMethod(alwaysRun = true)
+    public void setUp() {
+        DriverFactory.initDriver().get(ConfigReader.getInstance().get("base.url"));
+        log.info("Browser started");
+    }
+
+    @AfterMethod(alwaysRun = true)
+    public void tearDown() {
+        DriverFactory.quitDriver();
+        log.info("Browser closed");
+    }
+
+    protected WebDriver getDriver() {
+        return DriverFactory.getDriver();
+    }
+
+    protected WebDriverWait getWait() {
+        return new WebDriverWait(getDriver(), Duration.ofSeconds(ConfigReader.getInstance().getInt("timeout.seconds", 10)));
+    }
+}
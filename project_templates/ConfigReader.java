@@ -0,0 +1,47 @@
+package {{base_package}}.config;
+
+import java.io.IOException;
+import java.io.InputStream;
+import java.util.Properties;
+
+/**
+ * Singleton access to config.properties; system properties override file values
+ * (e.g. -Dbrowser=firefox).
+ */
+public final class ConfigReader {
+    private static final ConfigReader INSTANCE = new ConfigReader();
+
+    private final Properties properties = new Properties();
+
+    private ConfigReader() {
+        try (InputStream input = ConfigReader.class.getClassLoader().getResourceAsStream("config.properties")) {
+            if (input != null) {
+                properties.load(input);
+            }
+        } catch (IOException e) {
+            throw new IllegalStateException("Could not load config.properties", e);
+        }
+    }
+
+    public static ConfigReader getInstance() {
+        return INSTANCE;
+    }
+
+    public String get(String key) {
+        return System.getProperty(key, properties.getProperty(key));
+    }
+
+    public String get(String key, String defaultValue) {
+        String value = get(key);
+        return value != null ? value : defaultValue;
+    }
+
+    public int getInt(String key, int defaultValue) {
+        String value = get(key);
+        return value != null ? Integer.parseInt(value.trim()) : defaultValue;
+    }
+
+    public boolean getBoolean(String key) {
+        return Boolean.parseBoolean(get(key, "false").trim());
+    }
+}
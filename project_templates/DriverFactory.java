@@ -0,0 +1,66 @@
+package {{base_package}}.factory;
+
+import {{base_package}}.config.ConfigReader;
+import java.time.Duration;
+import org.openqa.selenium.WebDriver;
+import org.openqa.selenium.chrome.ChromeDriver;
+import org.openqa.selenium.chrome.ChromeOptions;
+import org.openqa.selenium.edge.EdgeDriver;
+import org.openqa.selenium.edge.EdgeOptions;
+import org.openqa.selenium.firefox.FirefoxDriver;
+import org.openqa.selenium.firefox.FirefoxOptions;
+
+/**
+ * Creates one WebDriver per thread so tests can run in parallel.
+ * Browser binaries are resolved by Selenium Manager.
+ */
+public final class DriverFactory {
+    private static final ThreadLocal<WebDriver> DRIVER = new ThreadLocal<>();
+
+    private DriverFactory() {
+    }
+
+    public static WebDriver initDriver() {
+        ConfigReader config = ConfigReader.getInstance();
+        boolean headless = config.getBoolean("headless");
+        WebDriver driver = switch (config.get("browser", "chrome").trim().toLowerCase()) {
+            case "firefox" -> {
+                FirefoxOptions options = new FirefoxOptions();
+                if (headless) {
+                    options.addArguments("-headless");
+                }
+                yield new FirefoxDriver(options);
+            }
+            case "edge" -> {
+                EdgeOptions options = new EdgeOptions();
+                if (headless) {
+                    options.addArguments("--headless=new");
+                }
+                yield new EdgeDriver(options);
+            }
+            default -> {
+                ChromeOptions options = new ChromeOptions();
+                if (headless) {
+                    options.addArguments("--headless=new");
+                }
+                yield new ChromeDriver(options);
+            }
+        };
+        driver.manage().window().maximize();
+        driver.manage().timeouts().pageLoadTimeout(Duration.ofSeconds(60));
+        DRIVER.set(driver);
+        return driver;
+    }
+
+    public static WebDriver getDriver() {
+        return DRIVER.get();
+    }
+
+    public static void quitDriver() {
+        WebDriver driver = DRIVER.get();
+        if (driver != null) {
+            driver.quit();
+            DRIVER.remove();
+        }
+    }
+}
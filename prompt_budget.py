@@ -0,0 +1,92 @@
+import threading
+
+from request_scheduler import estimate_tokens
+
+# Input budgets (estimated tokens): combined automation prompts above it are split into more
+# shards, and the Page Object context is trimmed to its own budget
+COMBINED_PROMPT_BUDGET = 6000
+PAGE_OBJECT_CONTEXT_BUDGET = 800
+# Longest single step or expected result kept verbatim
+MAX_LINE_CHARS = 300
+ELLIPSIS = "…"
+
+
+# Function to collapse runs of whitespace (indentation, blank lines) into single spaces
+def compact_text(text):
+    return " ".join(str(text).split())
+
+
+# Function to shorten text to at most max_chars, cutting at a word boundary
+def truncate_text(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max(1, max_chars - 1)]
+    if " " in cut[max_chars // 2:]:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip() + ELLIPSIS
+
+
+# Function to compact input lines (steps, expected results) for a prompt: whitespace is
+# collapsed, blank lines dropped and only lines longer than MAX_LINE_CHARS are shortened.
+# Every step and assertion is kept; prompts over budget are split instead (see split_to_budget).
+def compact_lines(lines):
+    compacted = (compact_text(line) for line in lines)
+    return [truncate_text(line, MAX_LINE_CHARS) for line in compacted if line]
+
+
+# Function to split groups (e.g. shards of test cases) until each one's prompt fits a token budget.
+# prompt_tokens(group) estimates a group's prompt; a single item over budget is kept as it is.
+def split_to_budget(groups, prompt_tokens, budget_tokens):
+    fitted = []
+    pending = [list(group) for group in reversed(groups)]
+    while pending:
+        group = pending.pop()
+        if len(group) > 1 and prompt_tokens(group) > budget_tokens:
+            middle = len(group) // 2
+            pending.extend([group[middle:], group[:middle]])
+        else:
+            fitted.append(group)
+    return fitted
+
+
+# Function to keep the leading entries of a ranked list that fit a token budget
+def fit_ranked_lines(lines, budget_tokens):
+    fitted = []
+    used = 0
+    for line in lines:
+        tokens = estimate_tokens(line)
+        if budget_tokens is not None and used + tokens > budget_tokens and fitted:
+            break
+        fitted.append(line)
+        used += tokens
+    return fitted
+
+
+# Tally of the automation prompts sent: their estimated input tokens (system instruction
+# included) and the tokens compacting the test case inputs removed from them. The app keeps
+# one per session and records a prompt only when it is sent, so cached responses are not counted.
+class PromptStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.sent_tokens = 0
+        self.compacted_tokens = 0
+
+    # uncompacted_prompt is the same prompt rendered with compact=False
+    def record(self, uncompacted_prompt, sent_prompt, system_instruction=None):
+        sent_tokens = estimate_tokens(sent_prompt)
+        compacted_tokens = max(0, estimate_tokens(uncompacted_prompt) - sent_tokens)
+        if system_instruction:
+            sent_tokens += estimate_tokens(system_instruction)
+        with self._lock:
+            self.prompts += 1
+            self.sent_tokens += sent_tokens
+            self.compacted_tokens += compacted_tokens
+
+    def stats(self):
+        with self._lock:
+            return {
+                "prompts": self.prompts,
+                "sent_tokens": self.sent_tokens,
+                "compacted_tokens": self.compacted_tokens
+            }
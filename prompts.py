@@ -0,0 +1,181 @@
+from models import TestCase
+from planning import test_case_dedup_key
+from project_assembler import FRAMEWORK_CONTEXT
+from prompt_budget import compact_lines, compact_text
+from structured_output import JsonArrayStreamParser, extract_json_array
+
+# Follow-up calls allowed for the remainder of a truncated or short test case response
+MAX_CONTINUATION_CALLS = 2
+
+
+# Function to build the test case generation prompt
+def build_test_cases_prompt(prompt, num_cases, priority):
+    return f"""
+        You are a senior QA engineer with 15+ years of experience. 
+        Generate {num_cases} comprehensive test cases based on the following requirements:
+        
+        {prompt}
+        
+        Instructions:
+        - Default Priority: {priority}
+        - Format test cases in JSON with this structure:
+        {{
+            "test_cases": [
+                {{
+                    "id": "TC_001",
+                    "title": "Test case title",
+                    "preconditions": ["Precondition 1", "Precondition 2"],
+                    "test_data": ["Data 1", "Data 2"],
+                    "test_steps": ["Step 1", "Step 2", "Step 3"],
+                    "expected_results": ["Expected result 1", "Expected result 2"],
+                    "priority": "High/Medium/Low",
+                    "attachments": []
+                }}
+            ]
+        }}
+        """
+
+
+# Function to build the prompt for the test cases still missing after a partial response.
+# The titles already received are listed so the model continues instead of starting over.
+def build_test_cases_remainder_prompt(prompt, num_cases, priority, existing_cases):
+    existing_titles = "\n".join(f"- {tc.title}" for tc in existing_cases)
+    return build_test_cases_prompt(
+        f"{prompt}\n\n(These test cases have already been written; do not repeat them:\n{existing_titles})",
+        num_cases,
+        priority
+    )
+
+
+# Function to validate decoded test case entries against the TestCase schema.
+# Entries that cannot be turned into a usable TestCase are skipped.
+def validate_test_case_entries(entries, default_priority="Medium"):
+    test_cases = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            test_cases.append(TestCase.from_dict(entry, default_priority=default_priority))
+        except ValueError:
+            continue
+    return test_cases
+
+
+# Function to extract validated test cases from a Gemini response.
+# Complete entries are recovered even if the response was truncated mid-array.
+def parse_test_cases_response(response_text, default_priority="Medium"):
+    return validate_test_case_entries(extract_json_array(response_text, "test_cases"), default_priority)
+
+
+# Function to request test cases, recovering from truncated or short responses.
+# generate(prompt, on_chunk) returns the response text and may call on_chunk with streamed text.
+# Complete entries from every response are kept and only the missing remainder is asked
+# for again, so a response that is mostly right never costs a full re-generation.
+# on_case(test_case) is called as each valid case is decoded from the stream.
+def request_test_cases(generate, prompt, num_cases, priority, on_case=None):
+    test_cases = []
+    seen = set()
+    request_prompt = build_test_cases_prompt(prompt, num_cases, priority)
+    for _ in range(1 + MAX_CONTINUATION_CALLS):
+        parser = JsonArrayStreamParser("test_cases")
+        received = []
+        streamed = False
+
+        def on_chunk(chunk):
+            nonlocal streamed
+            streamed = True
+            for tc in validate_test_case_entries(parser.feed(chunk), priority):
+                key = test_case_dedup_key(tc)
+                if key not in seen:
+                    seen.add(key)
+                    received.append(tc)
+                    if on_case:
+                        on_case(tc)
+
+        try:
+            response_text = generate(request_prompt, on_chunk)
+        except Exception:
+            # A stream that fails part-way is just another truncated response
+            if not (test_cases or received):
+                raise
+            response_text = ""
+        if not streamed:
+            on_chunk(response_text)
+        test_cases.extend(received)
+        remaining = num_cases - len(test_cases)
+        if remaining <= 0 or not received:
+            break
+        request_prompt = build_test_cases_remainder_prompt(prompt, remaining, priority, test_cases)
+    return test_cases[:num_cases]
+
+
+# Standards and output format shared by every automation prompt. Sent once per call as the
+# model's system instruction instead of being repeated in each prompt.
+AUTOMATION_SYSTEM_INSTRUCTION = f"""You are a super senior QA automation engineer with over 30 years of enterprise experience.
+Write complete, production-grade Selenium test automation code in Java using TestNG and Page Object Model.
+
+Use the following enterprise standards:
+- Java 17, Selenium WebDriver, TestNG
+- Page Object Model with @FindBy annotations
+- Factory Pattern for WebDriver and Singleton for configuration
+- Log4j2 logging and Allure reporting annotations
+- Explicit waits with WebDriverWait
+- Meaningful assertions
+- Thread-safe implementation
+
+{FRAMEWORK_CONTEXT}
+
+Output every file as a "// FILE: <path>" line followed by its Java code, with Page Objects under
+src/main/java/com/qa/pages/ and test classes under src/test/java/com/qa/tests/."""
+
+
+# Function to render a test case's steps and expected results (compacted with compact=True)
+def format_automation_test_case(test_case, compact=False):
+    steps, results = test_case.test_steps, test_case.expected_results
+    if compact:
+        steps, results = compact_lines(steps), compact_lines(results)
+    return "\n".join(
+        [f"Title: {compact_text(test_case.title)}", "Steps:"]
+        + [f"- {step}" for step in steps]
+        + ["Expected Results:"]
+        + [f"- {result}" for result in results]
+    )
+
+
+# Function to build the Java Selenium prompt for a test case (used with AUTOMATION_SYSTEM_INSTRUCTION).
+# page_objects is an optional "reuse these" section listing already generated Page Objects.
+# Inputs are compacted (every step and expected result is kept); compact=False sends them verbatim.
+def build_test_case_automation_prompt(test_case, page_objects="", compact=True):
+    sections = [
+        "Automate the following test case:",
+        format_automation_test_case(test_case, compact),
+        "Generate:\n"
+        "1. Page Object class for the relevant page(s)\n"
+        "2. Test class that extends BaseTest\n"
+        "3. Any necessary helper classes",
+        "Files: src/main/java/com/qa/pages/[PageName]Page.java, src/test/java/com/qa/tests/[TestName]Test.java"
+    ]
+    if page_objects:
+        sections.insert(2, page_objects)
+    return "\n\n".join(sections)
+
+
+# Function to build the combined Java Selenium prompt for multiple test cases.
+# Selections whose prompt exceeds COMBINED_PROMPT_BUDGET are split into more shards by the caller.
+def build_combined_automation_prompt(test_cases, suite_name="GeneratedTestSuite", page_objects="", compact=True):
+    test_cases_str = "\n\n".join(
+        f"Test Case {idx + 1}:\n{format_automation_test_case(tc, compact)}"
+        for idx, tc in enumerate(test_cases)
+    )
+    sections = [
+        "Create a SINGLE test class that includes test methods for the following test cases:",
+        test_cases_str,
+        "Generate:\n"
+        "1. Page Object classes for the relevant page(s)\n"
+        "2. A single test class that extends BaseTest and contains multiple @Test methods (one for each test case above)\n"
+        "3. Any necessary helper classes",
+        f"Files: src/main/java/com/qa/pages/[PageName]Page.java, src/test/java/com/qa/tests/{suite_name}.java"
+    ]
+    if page_objects:
+        sections.insert(2, page_objects)
+    return "\n\n".join(sections)
@@ -0,0 +1,145 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+# Priority lanes: lower values are served first when callers are waiting for quota
+INTERACTIVE = 0
+BULK = 1
+
+# HTTP status codes worth retrying: rate limited, server errors and deadline exceeded
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Output allowance reserved against the tokens/min budget when no max_output_tokens is set
+DEFAULT_OUTPUT_TOKENS = 2048
+
+
+# Function to roughly estimate the token count of a prompt (about four characters per token)
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+# Function to decide whether a failed Gemini call is worth retrying.
+# google.api_core exceptions carry the HTTP status as .code; connection-level failures
+# (timeouts, resets) are retried as well.
+def is_retryable(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+# Token bucket refilled continuously at capacity per period seconds.
+# Not thread-safe on its own; RequestScheduler guards it with its lock.
+class TokenBucket:
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Seconds until amount can be taken (requests larger than the bucket wait for a full bucket)
+    def wait_time(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    # May go negative, which delays later callers until the debt is refilled
+    def consume(self, amount):
+        self.tokens -= amount
+
+    def drain(self):
+        self.tokens = min(self.tokens, 0.0)
+
+
+# Process-wide scheduler for Gemini calls shared by every session.
+# Callers acquire a request slot and an estimated token budget from two token buckets
+# (requests/min and tokens/min) before calling the API. Waiting callers are served in
+# priority order, so interactive requests overtake queued bulk work. Rate-limit and
+# transient server errors are retried with exponential backoff and jitter; a 429 also
+# drains the request bucket so every caller backs off together.
+class RequestScheduler:
+    def __init__(self, requests_per_minute=60, tokens_per_minute=1_000_000, max_retries=5,
+                 base_delay=1.0, max_delay=60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._condition = threading.Condition()
+        self._waiting = []  # heap of (priority, ticket)
+        self._tickets = itertools.count()
+
+    # Block until a request slot and tokens are available and it is this caller's turn
+    def acquire(self, tokens=0, priority=BULK):
+        started = time.monotonic()
+        with self._condition:
+            entry = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == entry:
+                        now = time.monotonic()
+                        timeout = max(self._requests.wait_time(1, now), self._tokens.wait_time(tokens, now))
+                        if timeout <= 0:
+                            heapq.heappop(self._waiting)
+                            self._requests.consume(1)
+                            self._tokens.consume(tokens)
+                            self.requests += 1
+                            self.throttled_seconds += time.monotonic() - started
+                            self._condition.notify_all()
+                            return
+                    self._condition.wait(timeout)
+            except BaseException:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                raise
+
+    # Correct the tokens/min budget once the actual usage of a call is known
+    def settle(self, estimated_tokens, actual_tokens):
+        if actual_tokens is None:
+            return
+        with self._condition:
+            self._tokens.consume(actual_tokens - estimated_tokens)
+
+    # Returns the delay before retrying a failed attempt, or None if the error should be raised
+    def backoff(self, attempt, error):
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        with self._condition:
+            self.retries += 1
+            if getattr(error, "code", None) == 429:
+                self._requests.drain()
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    # Run fn() under the rate limits, retrying transient failures
+    def call(self, fn, tokens=0, priority=BULK):
+        for attempt in itertools.count():
+            self.acquire(tokens, priority)
+            try:
+                return fn()
+            except Exception as e:
+                delay = self.backoff(attempt, e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "waiting": len(self._waiting),
+                "throttled_seconds": self.throttled_seconds
+            }
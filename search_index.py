@@ -0,0 +1,99 @@
+import bisect
+import math
+import re
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "with"
+})
+# Title matches count more than matches in the body fields
+FIELD_WEIGHTS = (
+    ("title", 3),
+    ("preconditions", 1),
+    ("test_steps", 1),
+    ("expected_results", 1)
+)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+# Inverted index (token -> {case id: weighted term frequency}) over test case text.
+# Kept up to date incrementally by TestCaseCollection on add, edit and delete, so queries
+# only touch the postings of the query tokens instead of rescanning every case. The terms
+# are also kept sorted, so the last query token can be matched as a prefix with bisect.
+class TestCaseSearchIndex:
+    def __init__(self):
+        self._postings = {}
+        self._terms = []  # sorted keys of _postings
+        self._documents = {}  # case id -> Counter of weighted term frequencies
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, test_case):
+        self.remove(test_case.id)
+        weights = Counter()
+        for field, weight in FIELD_WEIGHTS:
+            value = getattr(test_case, field)
+            texts = [value] if isinstance(value, str) else value
+            for text in texts:
+                for token in tokenize(text):
+                    weights[token] += weight
+        self._documents[test_case.id] = weights
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._postings[token] = {}
+                bisect.insort(self._terms, token)
+            self._postings[token][test_case.id] = weight
+
+    def remove(self, case_id):
+        weights = self._documents.pop(case_id, None)
+        if not weights:
+            return
+        for token in weights:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(case_id, None)
+                if not postings:
+                    del self._postings[token]
+                    del self._terms[bisect.bisect_left(self._terms, token)]
+
+    # Postings of every term starting with prefix, merged into one {case id: weight} dict
+    def _prefix_postings(self, prefix):
+        merged = {}
+        start = bisect.bisect_left(self._terms, prefix)
+        for term in self._terms[start:bisect.bisect_left(self._terms, prefix + "\uffff")]:
+            for case_id, weight in self._postings[term].items():
+                merged[case_id] = merged.get(case_id, 0) + weight
+        return merged
+
+    # Returns IDs of cases containing every query token, best match first (TF-IDF ranking).
+    # The last token also matches longer words ("log" finds "login"), so results follow
+    # the query as it is typed. Returns None when the query has nothing to search for
+    # (e.g. only stop words), meaning no filter.
+    def search(self, query, limit=None):
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return None
+        postings = [self._postings.get(token) for token in tokens[:-1]] + [self._prefix_postings(tokens[-1])]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for token_postings in postings[1:]:
+            candidates.intersection_update(token_postings)
+            if not candidates:
+                return []
+
+        document_count = len(self._documents)
+        scores = {}
+        for token_postings in postings:
+            idf = math.log(1 + document_count / len(token_postings))
+            for case_id in candidates:
+                scores[case_id] = scores.get(case_id, 0.0) + (1 + math.log(token_postings[case_id])) * idf
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,155 @@
+import hashlib
+import importlib.util
+import os
+import threading
+from pathlib import Path
+
+# numpy, faiss and sentence-transformers are imported on first use so that importing this
+# module (and starting the app) does not pay for them until retrieval or duplicate checks run
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+# Function to load the sentence embedding model.
+# model_path may be a local directory, which keeps retrieval fully offline.
+def load_embedding_model(model_path=DEFAULT_EMBEDDING_MODEL):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_path, device="cpu")
+
+
+# Function to tell whether the embedding model can be loaded without network access: its
+# libraries are installed and the model is a local directory or already in the Hugging Face cache
+def embedding_model_available(model_path=DEFAULT_EMBEDDING_MODEL):
+    if any(importlib.util.find_spec(name) is None for name in ("numpy", "faiss", "sentence_transformers")):
+        return False
+    if Path(model_path).is_dir():
+        return True
+    repo_id = model_path if "/" in model_path else f"sentence-transformers/{model_path}"
+    hub_cache = os.getenv("HF_HUB_CACHE") or Path(os.getenv("HF_HOME", Path.home() / ".cache" / "huggingface")) / "hub"
+    return (Path(hub_cache) / f"models--{repo_id.replace('/', '--')}").is_dir()
+
+
+# Function to embed texts as L2-normalised float32 vectors, so inner product == cosine similarity
+def embed_texts(model, texts, batch_size=64):
+    import numpy as np
+    embeddings = model.encode(
+        list(texts),
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False
+    )
+    return np.ascontiguousarray(embeddings, dtype="float32")
+
+
+# Function to fingerprint a list of chunks so an index can be reused while the inputs are unchanged
+def chunks_fingerprint(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(hashlib.sha256(chunk.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+# Exact inner-product FAISS index over requirement chunks
+class RequirementIndex:
+    def __init__(self, model, chunks):
+        import faiss
+        self.model = model
+        self.chunks = list(chunks)
+        self.fingerprint = chunks_fingerprint(self.chunks)
+        self.index = faiss.IndexFlatIP(model.get_sentence_embedding_dimension())
+        if self.chunks:
+            self.index.add(embed_texts(model, self.chunks))
+
+    # Returns the top_k chunks most relevant to the query, in original document order
+    def retrieve(self, query, top_k):
+        if not self.chunks:
+            return []
+        top_k = min(top_k, len(self.chunks))
+        _, indices = self.index.search(embed_texts(self.model, [query]), top_k)
+        return [self.chunks[i] for i in sorted(i for i in indices[0] if i >= 0)]
+
+
+# Function to build the text used to compare test cases for similarity
+def test_case_text(test_case):
+    return "\n".join([test_case.title] + list(test_case.test_steps))
+
+
+# Incrementally maintained FAISS index over the stored test cases for near-duplicate detection.
+# Vectors are keyed by integer labels mapped to test case IDs; each entry also keeps a
+# hash of its text so update() only re-embeds cases that were added or edited. One index is
+# shared by all sessions: hold lock while using it, and follow the store with its changes
+# since store_version (see TestCaseStore.changes_since).
+class TestCaseIndex:
+    def __init__(self, model):
+        import faiss
+        self.model = model
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(model.get_sentence_embedding_dimension()))
+        self.lock = threading.Lock()
+        self.store_version = -1  # last store version applied; -1 = nothing yet
+        self._labels = {}  # test case id -> (label, text hash)
+        self._case_ids = {}  # label -> test case id
+        self._next_label = 0
+
+    def __len__(self):
+        return len(self._labels)
+
+    def _add(self, case_ids, text_hashes, vectors):
+        import numpy as np
+        labels = np.arange(self._next_label, self._next_label + len(case_ids), dtype="int64")
+        self._next_label += len(case_ids)
+        self.index.add_with_ids(vectors, labels)
+        for case_id, text_hash, label in zip(case_ids, text_hashes, labels):
+            self._labels[case_id] = (int(label), text_hash)
+            self._case_ids[int(label)] = case_id
+
+    def remove(self, case_ids):
+        import numpy as np
+        labels = [self._labels.pop(case_id)[0] for case_id in case_ids if case_id in self._labels]
+        for label in labels:
+            del self._case_ids[label]
+        if labels:
+            self.index.remove_ids(np.array(labels, dtype="int64"))
+
+    # Add or re-embed the given (new or edited) test cases; unchanged ones are skipped
+    def update(self, test_cases):
+        current = {}
+        for tc in test_cases:
+            current[tc.id] = hashlib.sha1(test_case_text(tc).encode("utf-8")).hexdigest()
+        self.remove([case_id for case_id, text_hash in current.items()
+                     if case_id in self._labels and self._labels[case_id][1] != text_hash])
+        missing = [tc for tc in test_cases if tc.id not in self._labels]
+        if missing:
+            self._add(
+                [tc.id for tc in missing],
+                [current[tc.id] for tc in missing],
+                embed_texts(self.model, [test_case_text(tc) for tc in missing])
+            )
+
+    # Check new test cases against the index (and against each other) before insertion.
+    # Returns, per case, (duplicate_case_id, similarity) or None. The cases are not added:
+    # they enter the index through update() once they are stored. Unless keep_duplicates,
+    # a duplicate within the batch is not matched against (it will be merged).
+    def find_duplicates(self, test_cases, threshold, keep_duplicates=True):
+        if not test_cases:
+            return []
+        import numpy as np
+        texts = [test_case_text(tc) for tc in test_cases]
+        vectors = embed_texts(self.model, texts)
+        matches = [None] * len(test_cases)
+        if self.index.ntotal:
+            scores, labels = self.index.search(vectors, 1)
+            for i, (score, label) in enumerate(zip(scores[:, 0], labels[:, 0])):
+                if label >= 0 and score >= threshold:
+                    matches[i] = (self._case_ids[int(label)], float(score))
+
+        # Duplicates within the batch itself
+        accepted = []
+        for i in range(len(test_cases)):
+            if matches[i] is None and accepted:
+                similarities = vectors[accepted] @ vectors[i]
+                best = int(np.argmax(similarities))
+                if similarities[best] >= threshold:
+                    matches[i] = (test_cases[accepted[best]].id, float(similarities[best]))
+            if matches[i] is None or keep_duplicates:
+                accepted.append(i)
+        return matches
@@ -0,0 +1,339 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Stay below SQLite's default limit on bound parameters per statement
+SQLITE_MAX_PARAMS = 900
+# Sequential test case IDs: a prefix such as "TC_AUTH_" followed by a number
+CASE_ID_PATTERN = re.compile(r'^(.*?)(\d+)$')
+
+
+# Content-addressed store for attachment bytes on local disk.
+# Blobs are written once under their SHA-256 (so identical uploads are stored once)
+# and test cases keep only the digest; image thumbnails are generated lazily on first
+# use and cached next to the blobs.
+class BlobStore:
+    def __init__(self, directory, thumbnail_size=(800, 600)):
+        self.directory = Path(directory)
+        self.thumbnail_size = thumbnail_size
+        (self.directory / "thumbnails").mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest):
+        return self.directory / digest[:2] / digest
+
+    def put(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest):
+        return self.path(digest).read_bytes()
+
+    def exists(self, digest):
+        return self.path(digest).exists()
+
+    def size(self, digest):
+        return self.path(digest).stat().st_size
+
+    # Returns the path of a cached PNG thumbnail, generating it on first use
+    def thumbnail(self, digest):
+        width, height = self.thumbnail_size
+        path = self.directory / "thumbnails" / f"{digest}_{width}x{height}.png"
+        if not path.exists():
+            from PIL import Image
+
+            with Image.open(self.path(digest)) as image:
+                image.thumbnail(self.thumbnail_size)
+                if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+                    image = image.convert("RGB")
+                tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, path)
+        return path
+
+
+# Function to build the attachment reference stored on a test case
+def attachment_ref(blob_store, name, mime_type, data):
+    return {
+        "name": name,
+        "type": mime_type,
+        "blob": blob_store.put(data),
+        "size": len(data)
+    }
+
+
+# Embedded SQLite store for test cases and generated automation code.
+# The database runs in WAL mode so reads never block the batched writes issued once per
+# rerun; one connection is shared across sessions behind a lock.
+class TestCaseStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS test_cases (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                priority TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_test_cases_priority ON test_cases (priority);
+            CREATE TABLE IF NOT EXISTS artifacts (
+                key TEXT PRIMARY KEY,
+                files TEXT NOT NULL,
+                fingerprint TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS id_counters (
+                prefix TEXT PRIMARY KEY,
+                last INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS deleted_test_cases (
+                id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+        """)
+        # Store version of each case's last write, so caches can follow the store incrementally
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(test_cases)")}
+        if "version" not in columns:
+            self._connection.execute("ALTER TABLE test_cases ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS idx_test_cases_version ON test_cases (version)")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def ping(self):
+        with self._lock:
+            return self._connection.execute("SELECT 1").fetchone() == (1,)
+
+    # (id, priority) for every stored case in insertion order; cheap enough to load at startup
+    def load_index(self):
+        with self._lock:
+            return self._connection.execute("SELECT id, priority FROM test_cases ORDER BY seq").fetchall()
+
+    # Full test case dicts for the given IDs
+    def load_cases(self, case_ids):
+        rows = []
+        with self._lock:
+            for start in range(0, len(case_ids), SQLITE_MAX_PARAMS):
+                batch = case_ids[start:start + SQLITE_MAX_PARAMS]
+                rows.extend(self._connection.execute(
+                    f"SELECT id, data FROM test_cases WHERE id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall())
+        return {case_id: json.loads(data) for case_id, data in rows}
+
+    # Counter of test case writes by any session; a change means cached indexes are stale
+    def version(self):
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    # Next free ID for prefix; must run inside a write transaction. The per-prefix counter
+    # starts from the highest stored ID, so IDs are never handed out twice across sessions.
+    def _next_id(self, prefix):
+        row = self._connection.execute("SELECT last FROM id_counters WHERE prefix = ?", (prefix,)).fetchone()
+        if row is None:
+            numbers = [int(case_id[len(prefix):]) for (case_id,) in self._connection.execute(
+                "SELECT id FROM test_cases WHERE substr(id, 1, ?) = ?", (len(prefix), prefix)
+            ) if case_id[len(prefix):].isdigit()]
+            last = max(numbers, default=0)
+        else:
+            last = row[0]
+        while True:
+            last += 1
+            case_id = f"{prefix}{last}"
+            if not self._connection.execute("SELECT 1 FROM test_cases WHERE id = ?", (case_id,)).fetchone():
+                break
+        self._connection.execute(
+            "INSERT INTO id_counters (prefix, last) VALUES (?, ?) ON CONFLICT(prefix) DO UPDATE SET last = excluded.last",
+            (prefix, last)
+        )
+        return case_id
+
+    # Reserve count new IDs for prefix (e.g. "TC_AUTH_")
+    def allocate_ids(self, prefix, count=1):
+        with self._lock:
+            with self._transaction():
+                return [self._next_id(prefix) for _ in range(count)]
+
+    # Apply one rerun's worth of changes in a single transaction.
+    # New cases are plain inserts: if another session has taken an ID meanwhile, the case is
+    # stored under the next free ID of the same prefix instead of overwriting the other case.
+    # Edits are upserts. Returns ({old ID: new ID} for reassigned inserts, store version).
+    def write_batch(self, inserts=(), updates=(), deletes=()):
+        now = time.time()
+        reassigned = {}
+        written = []
+        with self._lock:
+            with self._transaction():
+                self._connection.execute(
+                    "INSERT INTO store_meta (key, value) VALUES ('version', 1) "
+                    "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+                )
+                version = self._connection.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+                # Deletes first, so a deleted ID can be reused by a case added in the same batch
+                self._connection.executemany("DELETE FROM test_cases WHERE id = ?", [(case_id,) for case_id in deletes])
+                self._connection.executemany(
+                    "INSERT INTO deleted_test_cases (id, version) VALUES (?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET version = excluded.version",
+                    [(case_id, version) for case_id in deletes]
+                )
+                for case in inserts:
+                    try:
+                        self._connection.execute(
+                            "INSERT INTO test_cases (id, priority, data, updated_at, version) VALUES (?, ?, ?, ?, ?)",
+                            (case['id'], case['priority'], json.dumps(case), now, version)
+                        )
+                    except sqlite3.IntegrityError:
+                        match = CASE_ID_PATTERN.match(case['id'])
+                        new_id = self._next_id(match.group(1) if match else f"{case['id']}_")
+                        reassigned[case['id']] = new_id
+                        case = {**case, "id": new_id}
+                        self._connection.execute(
+                            "INSERT INTO test_cases (id, priority, data, updated_at, version) VALUES (?, ?, ?, ?, ?)",
+                            (case['id'], case['priority'], json.dumps(case), now, version)
+                        )
+                    written.append(case['id'])
+                self._connection.executemany(
+                    "INSERT INTO test_cases (id, priority, data, updated_at, version) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET priority = excluded.priority, data = excluded.data, "
+                    "updated_at = excluded.updated_at, version = excluded.version",
+                    [(case['id'], case['priority'], json.dumps(case), now, version) for case in updates]
+                )
+                written.extend(case['id'] for case in updates)
+                self._connection.executemany(
+                    "DELETE FROM deleted_test_cases WHERE id = ?", [(case_id,) for case_id in written]
+                )
+        return reassigned, version
+
+    # Cases written and IDs deleted after the given store version, for caches that follow the
+    # store incrementally (pass -1 for everything). Returns (store version, {id: case dict},
+    # deleted IDs); the version is read first, so a concurrent write is at worst reported twice.
+    def changes_since(self, version):
+        current = self.version()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, data FROM test_cases WHERE version > ?", (version,)
+            ).fetchall()
+            deleted = [case_id for case_id, in self._connection.execute(
+                "SELECT id FROM deleted_test_cases WHERE version > ?", (version,)
+            )]
+        return current, {case_id: json.loads(data) for case_id, data in rows}, deleted
+
+    def save_artifacts(self, artifacts, fingerprints=None):
+        fingerprints = fingerprints or {}
+        now = time.time()
+        with self._lock:
+            with self._transaction():
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO artifacts (key, files, fingerprint, updated_at) VALUES (?, ?, ?, ?)",
+                    [(key, json.dumps(files), fingerprints.get(key), now) for key, files in artifacts.items()]
+                )
+
+    # {key: (files, fingerprint)} for the stored artifacts among keys
+    def load_artifacts(self, keys):
+        keys = list(keys)
+        rows = []
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+                batch = keys[start:start + SQLITE_MAX_PARAMS]
+                rows.extend(self._connection.execute(
+                    f"SELECT key, files, fingerprint FROM artifacts WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall())
+        return {key: (json.loads(files), fingerprint) for key, files, fingerprint in rows}
+
+    # Background job state (see job_queue.JobQueue); job is the Job.to_dict() form
+    def save_job(self, job):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, data, updated_at) VALUES (?, ?, ?, ?)",
+                (job['id'], job['status'], json.dumps(job), job['updated_at'])
+            )
+
+    def append_job_result(self, job_id, seq, result):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO job_results (job_id, seq, data) VALUES (?, ?, ?)",
+                (job_id, seq, json.dumps(result))
+            )
+
+    def load_job(self, job_id):
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_job_results(self, job_id, start=0):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT data FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, start)
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    # Mark jobs left unfinished by a previous process with the given status
+    def interrupt_unfinished_jobs(self, status, finished_statuses):
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT data FROM jobs WHERE status NOT IN ({','.join('?' * len(finished_statuses))})",
+                list(finished_statuses)
+            ).fetchall()
+            now = time.time()
+            with self._transaction():
+                for data, in rows:
+                    job = json.loads(data)
+                    job['status'] = status
+                    job['updated_at'] = now
+                    self._connection.execute(
+                        "UPDATE jobs SET status = ?, data = ?, updated_at = ? WHERE id = ?",
+                        (status, json.dumps(job), now, job['id'])
+                    )
+
+    def delete_jobs_before(self, timestamp):
+        with self._lock:
+            with self._transaction():
+                self._connection.execute(
+                    "DELETE FROM job_results WHERE job_id IN (SELECT id FROM jobs WHERE updated_at < ?)", (timestamp,)
+                )
+                self._connection.execute("DELETE FROM jobs WHERE updated_at < ?", (timestamp,))
+
+    @contextmanager
+    def _transaction(self):
+        # Take the write lock up front so concurrent writers (other processes) queue instead of
+        # failing to upgrade a read lock half-way through
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
@@ -1,30 +1,157 @@
+import time
+script_started = time.perf_counter()
 import os
+import sys
 import streamlit as st
 from dotenv import load_dotenv
-import google.generativeai as genai
-import json
-import re
-import base64
-import PyPDF2
-import docx
-import pandas as pd
-from io import BytesIO
-import tempfile
+import html
+import hashlib
 from pathlib import Path
-import zipfile
-import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from gemini_client import ResponseCache, generate_text, stream_text
+from model_backends import GEMINI, create_model_client
+from request_scheduler import BULK, INTERACTIVE, RequestScheduler, estimate_tokens
+from job_queue import INTERRUPTED, JobQueue
+from archives import ArchiveCache
+from code_artifacts import IncrementalCodeParser, merge_generated_files, parse_generated_code
+from file_processors import FILE_PROCESSORS, ExtractionCache, extract_files_in_pool, resolve_file_type
+from models import PRIORITIES, TestCase, TestCaseCollection
+from planning import (MAX_CASES_PER_CALL, MAX_CASES_PER_SHARD, MAX_SECTION_CHARS, merge_section_test_cases, plan_coverage,
+                      plan_test_case_generation, shard_test_cases, test_case_feature_tokens)
+from project_assembler import BUILD_TOOLS, MAVEN, assemble_project
+from page_objects import PageObjectRegistry
+from prompt_budget import COMBINED_PROMPT_BUDGET, PAGE_OBJECT_CONTEXT_BUDGET, PromptStats, split_to_budget
+from prompts import (AUTOMATION_SYSTEM_INSTRUCTION, build_combined_automation_prompt, build_test_case_automation_prompt,
+                     request_test_cases)
+from storage import BlobStore, TestCaseStore, attachment_ref
+from semantic_index import (DEFAULT_EMBEDDING_MODEL, RequirementIndex, TestCaseIndex, chunks_fingerprint,
+                            embedding_model_available, load_embedding_model)
+imports_finished = time.perf_counter()
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini
+# Configure Gemini (MODEL_BACKEND=fake runs offline against synthetic responses)
+model_backend = os.getenv("MODEL_BACKEND", GEMINI)
 api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
+if model_backend == GEMINI and not api_key:
     st.error("Please set GEMINI_API_KEY in your .env file")
     st.stop()
 
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel('gemini-1.5-flash')
+# Timings of the first script run in this process (cold start), for the performance report
+@st.cache_resource
+def get_startup_timings():
+    return {}
+
+# Gemini client shared by all sessions and reruns, so the SDK is configured and its
+# connection set up once per process. It is rebuilt if it has been closed or its
+# periodic health check fails (e.g. after the API key was revoked).
+@st.cache_resource(validate=lambda client: client.is_healthy())
+def get_gemini_client(backend, api_key, model_name):
+    return create_model_client(backend, api_key, model_name, latency=float(os.getenv("FAKE_MODEL_LATENCY", "0.5")))
+
+gemini_client = get_gemini_client(model_backend, api_key, "gemini-1.5-flash")
+
+# Response cache shared by all sessions, persisted on disk between restarts
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(
+        os.getenv("GEMINI_CACHE_DIR", ".gemini_cache"),
+        max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "1000")),
+        max_bytes=int(os.getenv("GEMINI_CACHE_MAX_MB", "100")) * 1024 * 1024,
+        ttl=int(os.getenv("GEMINI_CACHE_TTL_HOURS", "168")) * 3600
+    )
+
+response_cache = get_response_cache()
+
+# Rate limiter and retry policy for Gemini calls, shared by all sessions so they share the quota
+@st.cache_resource
+def get_request_scheduler():
+    return RequestScheduler(
+        requests_per_minute=int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60")),
+        tokens_per_minute=int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000")),
+        max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+    )
+
+request_scheduler = get_request_scheduler()
+
+# Seconds between progress polls while background jobs are running
+JOB_POLL_SECONDS = 2
+
+# ZIP archives of generated code, compressed once per distinct content and shared by all sessions
+@st.cache_resource
+def get_archive_cache():
+    return ArchiveCache(max_memory_bytes=int(os.getenv("ARCHIVE_CACHE_MB", "64")) * 1024 * 1024)
+
+archive_cache = get_archive_cache()
+
+# Content-addressed attachment store shared by all sessions
+@st.cache_resource
+def get_blob_store():
+    return BlobStore(os.getenv("BLOB_STORE_DIR", ".blob_store"))
+
+blob_store = get_blob_store()
+
+# SQLite store for test cases and generated code, shared by all sessions
+@st.cache_resource
+def get_test_case_store():
+    return TestCaseStore(os.getenv("TEST_CASE_DB_PATH", "qe_suite.db"))
+
+test_case_store = get_test_case_store()
+
+# Background generation jobs shared by all sessions; progress is kept in the test case store
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(test_case_store, max_workers=int(os.getenv("BACKGROUND_WORKERS", "2")))
+
+job_queue = get_job_queue()
+
+# Function to open the persisted test cases. Only (id, priority) rows are read up front;
+# full cases are loaded from the store when a page of them is displayed.
+def load_test_case_collection(store):
+    return TestCaseCollection(
+        index=store.load_index(),
+        loader=lambda case_ids: {case_id: TestCase(**data) for case_id, data in store.load_cases(case_ids).items()}
+    )
+
+# Function to reload the test case index when another session has changed the store.
+# Unsaved changes are written first; the selection is kept for cases that still exist.
+def refresh_test_cases():
+    version = test_case_store.version()
+    if version == st.session_state.test_cases_store_version:
+        return
+    previous = st.session_state.test_cases
+    collection = load_test_case_collection(test_case_store)
+    for case_id in previous.ids():
+        if previous.is_selected(case_id):
+            collection.set_selected(case_id, True)
+    st.session_state.test_cases = collection
+    st.session_state.test_cases_store_version = version
+    st.session_state.filtered_test_cases = None
+
+# Function to write this run's test case and automation code changes in one batch.
+# New cases whose ID another session took in the meantime are stored under a fresh ID.
+def persist_pending_changes():
+    collection = st.session_state.test_cases
+    added, edited, deleted = collection.drain_changes()
+    if added or edited or deleted:
+        reassigned, version = test_case_store.write_batch(
+            [tc.to_dict() for tc in added], [tc.to_dict() for tc in edited], deleted
+        )
+        for case_id, new_id in reassigned.items():
+            collection.reassign_id(case_id, new_id)
+        if version == st.session_state.test_cases_store_version + 1:
+            # Only this session wrote since the index was loaded, so it is still current
+            st.session_state.test_cases_store_version = version
+    if st.session_state.pending_artifacts:
+        pending = st.session_state.pending_artifacts
+        test_case_store.save_artifacts(
+            {key: files for key, (files, _) in pending.items()},
+            {key: fingerprint for key, (_, fingerprint) in pending.items()}
+        )
+        st.session_state.pending_artifacts = {}
 
 # Streamlit app configuration
 st.set_page_config(
@@ -34,236 +161,14 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for styling
-st.markdown("""
+# Custom CSS for styling, read from disk once per process
+@st.cache_resource
+def load_stylesheet():
+    return (Path(__file__).parent / "styles.css").read_text(encoding="utf-8")
+
+st.markdown(f"""
 <style>
-:root {
-    --primary: #1e3a8a;
-    --secondary: #2ecc71;
-    --dark: #2b2b2b;
-    --light: #f8f8f8;
-    --gray: #e0e0e0;
-    --warning: #ff9800;
-}
-.header {
-    color: var(--primary);
-    padding: 15px 0;
-    border-bottom: 3px solid var(--primary);
-    margin-bottom: 20px;
-}
-.sidebar .sidebar-content {
-    background-color: #f0f7ff;
-}
-.stButton>button {
-    background-color: var(--primary);
-    color: white;
-    border-radius: 8px;
-    padding: 12px 28px;
-    font-weight: bold;
-    transition: all 0.3s;
-}
-.stButton>button:hover {
-    background-color: #152c6e;
-    transform: scale(1.05);
-}
-.stTextArea textarea {
-    border: 2px solid var(--primary) !important;
-    border-radius: 8px;
-    padding: 12px;
-}
-.success-box {
-    background-color: #e6f7e9;
-    border-left: 5px solid var(--secondary);
-    padding: 20px;
-    margin: 25px 0;
-    border-radius: 0 10px 10px 0;
-}
-.test-case-card {
-    border: 1px solid var(--gray);
-    border-radius: 10px;
-    padding: 20px;
-    margin: 15px 0;
-    box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-    background-color: #ffffff;
-    transition: transform 0.3s;
-}
-.test-case-card:hover {
-    transform: translateY(-5px);
-    box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-}
-.test-case-card h4 {
-    color: var(--primary);
-    border-bottom: 1px solid var(--gray);
-    padding-bottom: 12px;
-    margin-top: 0;
-}
-.highlight {
-    background-color: #fffacd;
-    padding: 4px 8px;
-    border-radius: 5px;
-    font-weight: bold;
-}
-.footer {
-    text-align: center;
-    padding: 25px;
-    color: #666;
-    font-size: 0.95rem;
-    margin-top: 40px;
-    border-top: 1px solid var(--gray);
-}
-.traceability-matrix {
-    margin-top: 35px;
-    border: 1px solid var(--gray);
-    border-radius: 10px;
-    padding: 20px;
-    background-color: #f9f9f9;
-}
-.traceability-matrix h3 {
-    color: var(--primary);
-    margin-top: 0;
-}
-.search-results {
-    background-color: #f0f8ff;
-    padding: 20px;
-    border-radius: 10px;
-    margin: 15px 0;
-}
-.automation-code {
-    background-color: var(--dark);
-    color: var(--light);
-    padding: 20px;
-    border-radius: 10px;
-    margin: 20px 0;
-    font-family: 'Fira Code', monospace;
-    overflow-x: auto;
-}
-.code-header {
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-    margin-bottom: 15px;
-    padding-bottom: 10px;
-    border-bottom: 1px solid #444;
-}
-.code-header h3 {
-    color: var(--secondary);
-    margin: 0;
-}
-.code-container {
-    max-height: 500px;
-    overflow-y: auto;
-}
-.btn-download {
-    background-color: var(--secondary) !important;
-    margin: 5px;
-}
-.btn-download:hover {
-    background-color: #27ae60 !important;
-}
-.btn-generate {
-    background-color: #9b59b6 !important;
-}
-.btn-generate:hover {
-    background-color: #8e44ad !important;
-}
-.tab-content {
-    padding: 20px 0;
-}
-.file-info {
-    background-color: #e3f2fd;
-    padding: 15px;
-    border-radius: 8px;
-    margin: 10px 0;
-}
-.form-section {
-    border: 1px solid #ddd;
-    border-radius: 10px;
-    padding: 20px;
-    margin: 15px 0;
-    background-color: #f9f9f9;
-}
-.form-header {
-    background-color: #1e3a8a;
-    color: white;
-    padding: 10px 15px;
-    border-radius: 8px 8px 0 0;
-    margin: -20px -20px 20px -20px;
-}
-.attachment-preview {
-    max-width: 200px;
-    max-height: 150px;
-    border-radius: 5px;
-    margin: 5px;
-}
-.framework-file {
-    background-color: #e8f4f8;
-    border-left: 4px solid #1e3a8a;
-    padding: 15px;
-    margin: 10px 0;
-    border-radius: 4px;
-}
-.file-name {
-    font-weight: bold;
-    color: #1e3a8a;
-}
-.test-case-container {
-    max-height: 600px;
-    overflow-y: auto;
-    padding: 15px;
-    border: 1px solid #e0e0e0;
-    border-radius: 10px;
-    margin: 15px 0;
-}
-.bulk-actions {
-    display: flex;
-    gap: 10px;
-    margin-bottom: 20px;
-    padding: 15px;
-    background-color: #f8f9fa;
-    border-radius: 8px;
-}
-.toast {
-    position: fixed;
-    top: 20px;
-    right: 20px;
-    padding: 15px 25px;
-    background-color: #2ecc71;
-    color: white;
-    border-radius: 8px;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-    z-index: 1000;
-    animation: fadeInOut 3s ease-in-out;
-}
-@keyframes fadeInOut {
-    0% { opacity: 0; transform: translateY(-20px); }
-    10% { opacity: 1; transform: translateY(0); }
-    90% { opacity: 1; transform: translateY(0); }
-    100% { opacity: 0; transform: translateY(-20px); }
-}
-.draggable-item {
-    padding: 12px;
-    margin: 8px 0;
-    background-color: #f8f9fa;
-    border: 1px solid #e0e0e0;
-    border-radius: 8px;
-    cursor: grab;
-    transition: all 0.2s;
-}
-.draggable-item:hover {
-    background-color: #e9ecef;
-    transform: translateY(-2px);
-}
-.draggable-item.dragging {
-    opacity: 0.5;
-    border: 2px dashed #1e3a8a;
-}
-.combined-toggle {
-    background-color: #e3f2fd;
-    padding: 15px;
-    border-radius: 10px;
-    margin-bottom: 20px;
-}
-</style>
+{load_stylesheet()}</style>
 <link href="https://fonts.googleapis.com/css2?family=Fira+Code:wght@400;500&display=swap" rel="stylesheet">
 """, unsafe_allow_html=True)
 
@@ -273,7 +178,8 @@ st.markdown("Generate professional test cases and enterprise-grade Selenium auto
 
 # Initialize session state
 if 'test_cases' not in st.session_state:
-    st.session_state.test_cases = []
+    st.session_state.test_cases_store_version = test_case_store.version()
+    st.session_state.test_cases = load_test_case_collection(test_case_store)
 if 'automation_code' not in st.session_state:
     st.session_state.automation_code = {}
 if 'current_tc_id' not in st.session_state:
@@ -282,6 +188,10 @@ if 'framework_generated' not in st.session_state:
     st.session_state.framework_generated = False
 if 'framework_code' not in st.session_state:
     st.session_state.framework_code = {}
+if 'page_objects' not in st.session_state:
+    st.session_state.page_objects = PageObjectRegistry()
+if 'project_build_tool' not in st.session_state:
+    st.session_state.project_build_tool = MAVEN
 if 'file_content' not in st.session_state:
     st.session_state.file_content = ""
 if 'show_toast' not in st.session_state:
@@ -296,8 +206,53 @@ if 'editing_test_case' not in st.session_state:
     st.session_state.editing_test_case = None
 if 'test_cases_str' not in st.session_state:
     st.session_state.test_cases_str = ""
+if 'extraction_cache' not in st.session_state:
+    st.session_state.extraction_cache = ExtractionCache(int(os.getenv("EXTRACTION_CACHE_MB", "32")) * 1024 * 1024)
+if 'requirement_index' not in st.session_state:
+    st.session_state.requirement_index = None
+if 'embedding_available' not in st.session_state:
+    # Retrieval and duplicate checks need the embedding model; never trigger a download by default
+    st.session_state.embedding_available = embedding_model_available(
+        os.getenv("EMBEDDING_MODEL_PATH", DEFAULT_EMBEDDING_MODEL)
+    )
+if 'duplicate_mode' not in st.session_state:
+    st.session_state.duplicate_mode = "Flag" if st.session_state.embedding_available else "Off"
+if 'duplicate_threshold' not in st.session_state:
+    st.session_state.duplicate_threshold = 0.92
+if 'filtered_test_cases' not in st.session_state:
+    st.session_state.filtered_test_cases = None
+if 'pending_artifacts' not in st.session_state:
+    st.session_state.pending_artifacts = {}
+if 'automation_fingerprints' not in st.session_state:
+    st.session_state.automation_fingerprints = {}
+if 'incremental_generation' not in st.session_state:
+    st.session_state.incremental_generation = True  # Separate Test Classes
+if 'incremental_combined' not in st.session_state:
+    # Off by default so large combined suites are generated in concurrent shards
+    st.session_state.incremental_combined = False
 if 'generation_mode' not in st.session_state:
     st.session_state.generation_mode = "combined"  # combined or separate
+if 'max_workers' not in st.session_state:
+    st.session_state.max_workers = 4
+if 'request_timeout' not in st.session_state:
+    st.session_state.request_timeout = 120
+if 'stream_output' not in st.session_state:
+    st.session_state.stream_output = True
+if 'shard_size' not in st.session_state:
+    st.session_state.shard_size = 8
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = {}  # background job id -> number of results applied
+if 'job_errors' not in st.session_state:
+    st.session_state.job_errors = []
+if 'prompt_stats' not in st.session_state:
+    # Automation prompts sent by this session and its background jobs
+    st.session_state.prompt_stats = PromptStats()
+prompt_stats_at_start = st.session_state.prompt_stats.stats()
+
+# Changes from a run that ended early (e.g. st.rerun()) are written at the start of the next one,
+# then changes made by other sessions are picked up
+persist_pending_changes()
+refresh_test_cases()
     
 # Create a copy for form manipulation
 manual_test_case_form = {
@@ -311,195 +266,396 @@ manual_test_case_form = {
     "attachments": []
 }
 
-# File processing functions
-def extract_text_from_txt(file):
-    return file.read().decode("utf-8")
-
-def extract_text_from_pdf(file):
-    text = ""
-    pdf_reader = PyPDF2.PdfReader(file)
-    for page in pdf_reader.pages:
-        text += page.extract_text()
-    return text
-
-def extract_text_from_docx(file):
-    doc = docx.Document(BytesIO(file.read()))
-    return "\n".join([para.text for para in doc.paragraphs])
-
-def extract_text_from_csv(file):
-    df = pd.read_csv(file)
-    return df.to_markdown()
-
-def extract_text_from_xlsx(file):
-    df = pd.read_excel(file)
-    return df.to_markdown()
-
-FILE_PROCESSORS = {
-    "text/plain": extract_text_from_txt,
-    "application/pdf": extract_text_from_pdf,
-    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": extract_text_from_docx,
-    "text/csv": extract_text_from_csv,
-    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": extract_text_from_xlsx
-}
+# Process pool for requirement extraction, shared by all sessions.
+# Workers are spawned rather than forked so they never inherit Streamlit's threads.
+@st.cache_resource
+def get_extraction_pool():
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+# Function to replace the extraction pool after a worker died (e.g. out of memory); a broken
+# pool rejects every later submit, so it is shut down and the next upload starts a fresh one
+def reset_extraction_pool():
+    get_extraction_pool().shutdown(wait=False, cancel_futures=True)
+    get_extraction_pool.clear()
+
+# Files above this size are worth shipping to the process pool even on their own
+POOL_EXTRACTION_MIN_BYTES = 2 * 1024 * 1024
+
+# Function to ingest uploaded requirement files into text chunks.
+# Extraction results, failures included, are cached per session by the SHA-256 of the file
+# bytes, so reruns (and re-uploads of the same file) skip extraction entirely; the cache is
+# bounded by EXTRACTION_CACHE_MB and evicts the least recently used files.
+# Batches of files (and large single files) are extracted in the process pool.
+def ingest_requirement_files(files, on_progress=None):
+    cache = st.session_state.extraction_cache
+    hashes = [hashlib.sha256(file.getbuffer()).hexdigest() for file in files]
+
+    pending = {}
+    extracted = {}  # this run's results, kept even if the cache evicts them
+    for file, file_hash in zip(files, hashes):
+        if file_hash in cache or file_hash in pending:
+            continue
+        file_type = resolve_file_type(file.name, file.type)
+        if file_type is None:
+            st.warning(f"Unsupported file type: {file.name}")
+            continue
+        pending[file_hash] = (file, file_type)
+
+    if len(pending) > 1 or any(file.size >= POOL_EXTRACTION_MIN_BYTES for file, _ in pending.values()):
+        pending_hashes = list(pending)
+        pending_files = [file for file, _ in pending.values()]
+        try:
+            file_chunks, errors = extract_files_in_pool(
+                get_extraction_pool(),
+                [(file.name, file_type, file.getvalue()) for file, file_type in pending.values()],
+                on_progress=on_progress
+            )
+        except BrokenProcessPool:
+            reset_extraction_pool()
+            st.error("Requirement extraction workers stopped unexpectedly. Please try again.")
+            file_chunks, errors = [None] * len(pending_hashes), []
+        if any(isinstance(error, BrokenProcessPool) for _, error in errors):
+            # A worker died mid-extraction
+            reset_extraction_pool()
+        for file_index, error in errors:
+            st.error(f"Error extracting text from {pending_files[file_index].name}: {str(error)}")
+        file_errors = dict(errors)
+        for file_index, (file_hash, chunks) in enumerate(zip(pending_hashes, file_chunks)):
+            error = file_errors.get(file_index)
+            if chunks is not None:
+                extracted[file_hash] = cache.set_chunks(file_hash, chunks)
+            elif error is not None and not isinstance(error, BrokenProcessPool):
+                # Unreadable file: remember the failure instead of parsing it again next run
+                extracted[file_hash] = cache.set_error(file_hash, error)
+    else:
+        for file_hash, (file, file_type) in pending.items():
+            file.seek(0)
+            try:
+                extracted[file_hash] = cache.set_chunks(file_hash, FILE_PROCESSORS[file_type](
+                    file,
+                    on_progress=lambda fraction, file_name=file.name: on_progress and on_progress(fraction, file_name)
+                ))
+            except Exception as e:
+                st.error(f"Error extracting text from {file.name}: {str(e)}")
+                extracted[file_hash] = cache.set_error(file_hash, e)
+
+    chunks = []
+    for file_hash, file in dict(zip(hashes, files)).items():
+        entry = extracted.get(file_hash) or cache.get(file_hash)
+        if entry is None:
+            continue
+        file_chunks, error = entry
+        if file_chunks is not None:
+            chunks.extend(file_chunks)
+        elif file_hash not in pending:
+            # Failed on an earlier run; errors from this run were reported above
+            st.error(f"Error extracting text from {file.name}: {error}")
+    return chunks
+
+# Local sentence embedding model shared by all sessions
+@st.cache_resource
+def get_embedding_model():
+    return load_embedding_model(os.getenv("EMBEDDING_MODEL_PATH", DEFAULT_EMBEDDING_MODEL))
+
+# Function to select the requirement chunks most relevant to the query.
+# The FAISS index is kept in session state and only rebuilt when the uploaded chunks change.
+def retrieve_relevant_chunks(chunks, query, top_k):
+    index = st.session_state.requirement_index
+    if index is None or index.fingerprint != chunks_fingerprint(chunks):
+        index = RequirementIndex(get_embedding_model(), chunks)
+        st.session_state.requirement_index = index
+    return index.retrieve(query, top_k)
+
+# Near-duplicate index over the stored test cases, shared by all sessions and kept in step
+# with the store incrementally, so a new session does not embed every stored case again
+@st.cache_resource
+def get_test_case_index():
+    return TestCaseIndex(get_embedding_model())
+
+# Function to check new test cases for near-duplicates before they are saved.
+# "Flag" keeps duplicates but marks them with the ID of the similar case, "Auto-merge"
+# folds their preconditions and test data into the existing case instead of adding them.
+# Returns the test cases that should be inserted. If the embedding model or FAISS cannot be
+# loaded (e.g. offline), the cases are inserted unchecked with a warning.
+def handle_near_duplicates(new_cases):
+    mode = st.session_state.duplicate_mode
+    if mode == "Off" or not new_cases:
+        return new_cases
+    try:
+        index = get_test_case_index()
+        with index.lock:
+            # Only cases stored or deleted since the index last looked are (re-)embedded
+            version, changed, deleted = test_case_store.changes_since(index.store_version)
+            index.remove(deleted)
+            index.update([TestCase(**data) for data in changed.values()])
+            index.store_version = version
+            matches = index.find_duplicates(new_cases, st.session_state.duplicate_threshold,
+                                            keep_duplicates=(mode == "Flag"))
+    except Exception as e:
+        # The index may be half-updated; rebuild it on the next check
+        get_test_case_index.clear()
+        st.warning(f"⚠️ Near-duplicate check skipped: {e}")
+        return new_cases
+
+    batch_cases = {}
+    to_insert = []
+    for tc, match in zip(new_cases, matches):
+        if match is None:
+            to_insert.append(tc)
+            batch_cases[tc.id] = tc
+        elif mode == "Flag":
+            tc.duplicate_of = match[0]
+            to_insert.append(tc)
+            batch_cases[tc.id] = tc
+        else:
+            target = st.session_state.test_cases.get(match[0]) or batch_cases.get(match[0])
+            if target is None:
+                # Stored by another session after this one last loaded the cases: flag instead
+                tc.duplicate_of = match[0]
+                to_insert.append(tc)
+                batch_cases[tc.id] = tc
+                continue
+            target.preconditions = list(dict.fromkeys(target.preconditions + tc.preconditions))
+            target.test_data = list(dict.fromkeys(target.test_data + tc.test_data))
+            st.session_state.test_cases.touch(target.id)
+    return to_insert
+
+# Function to add generated test cases under fresh IDs, after near-duplicate handling
+def add_generated_test_cases(generated_cases, id_prefix):
+    # IDs come from the store so concurrent sessions never hand out the same one
+    for tc, case_id in zip(generated_cases, test_case_store.allocate_ids(id_prefix, len(generated_cases))):
+        tc.id = case_id
+    new_cases = handle_near_duplicates(generated_cases)
+    st.session_state.test_cases.extend(new_cases)
+    merged = len(generated_cases) - len(new_cases)
+    flagged = sum(1 for tc in new_cases if tc.duplicate_of)
+    message = f"✅ Successfully generated {len(new_cases)} test cases!"
+    if merged:
+        message += f" ({merged} near-duplicates merged)"
+    elif flagged:
+        message += f" ({flagged} flagged as near-duplicates)"
+    show_toast(message)
+
+# Function to call Gemini, optionally streaming chunks to a callback as they arrive.
+# These calls back a user waiting on the page, so they go in the interactive lane.
+def request_generation(prompt_template, on_chunk=None, system_instruction=None, on_request=None):
+    model = gemini_client.model_for(system_instruction)
+    if on_chunk is None:
+        return generate_text(model, prompt_template, cache=response_cache, scheduler=request_scheduler,
+                             priority=INTERACTIVE, on_request=on_request)
+    chunks = []
+    for chunk in stream_text(model, prompt_template, cache=response_cache, scheduler=request_scheduler,
+                             priority=INTERACTIVE, on_request=on_request):
+        chunks.append(chunk)
+        on_chunk(chunk)
+    return "".join(chunks)
 
 # Function to generate test cases with Gemini
-def generate_test_cases_from_prompt(prompt, num_cases, priority):
+def generate_test_cases_from_prompt(prompt, num_cases, priority, on_chunk=None):
+    def generate(request_prompt, on_response_chunk):
+        if on_chunk is None:
+            return request_generation(request_prompt)
+        def forward(chunk):
+            on_chunk(chunk)
+            on_response_chunk(chunk)
+        return request_generation(request_prompt, forward)
+
     try:
-        prompt_template = f"""
-        You are a senior QA engineer with 15+ years of experience. 
-        Generate {num_cases} comprehensive test cases based on the following requirements:
-        
-        {prompt}
-        
-        Instructions:
-        - Default Priority: {priority}
-        - Format test cases in JSON with this structure:
-        {{
-            "test_cases": [
-                {{
-                    "id": "TC_001",
-                    "title": "Test case title",
-                    "preconditions": ["Precondition 1", "Precondition 2"],
-                    "test_data": ["Data 1", "Data 2"],
-                    "test_steps": ["Step 1", "Step 2", "Step 3"],
-                    "expected_results": ["Expected result 1", "Expected result 2"],
-                    "priority": "High/Medium/Low",
-                    "attachments": []
-                }}
-            ]
-        }}
-        """
-        
-        response = model.generate_content(prompt_template)
-        json_match = re.search(r'\{[\s\S]*\}', response.text)
-        if json_match:
-            json_str = json_match.group()
-            data = json.loads(json_str)
-            return data.get("test_cases", [])
-        return []
+        return request_test_cases(generate, prompt, num_cases, priority)
     except Exception as e:
         st.error(f"Error generating test cases: {str(e)}")
         return []
 
+# Function to generate test cases for large requirement documents with map-reduce.
+# Sections are generated in parallel (map), then results are merged in document order
+# and de-duplicated (reduce) so IDs assigned afterwards are stable between runs.
+# on_progress(done, total) and on_section(index, cases) are called from the calling
+# thread as each section finishes.
+def generate_test_cases_map_reduce(text, num_cases, priority, max_workers=4, timeout=None, on_progress=None,
+                                   on_section=None):
+    tasks = plan_test_case_generation(text, num_cases)
+    request_options = {"timeout": timeout} if timeout else None
+
+    def worker(task):
+        section, count, note = task
+
+        def generate(request_prompt, on_chunk):
+            return generate_text(
+                gemini_client.model,
+                request_prompt,
+                cache=response_cache,
+                request_options=request_options,
+                scheduler=request_scheduler,
+                priority=BULK
+            )
+        return request_test_cases(generate, f"{note}\n\n{section}", count, priority)
+
+    results = [[] for _ in tasks]
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(worker, task): idx for idx, task in enumerate(tasks)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            idx = futures[future]
+            try:
+                results[idx] = future.result()
+            except Exception as e:
+                errors.append(e)
+            else:
+                if on_section:
+                    on_section(idx, results[idx])
+            if on_progress:
+                on_progress(done, len(tasks))
+
+    return merge_section_test_cases(results, num_cases), errors
+
+# Function to build the compacted automation prompt for a test case.
+# Returns (prompt, on_request): pass on_request to the Gemini call so the prompt is recorded
+# in prompt_stats only when it is sent (the uncompacted prompt is rendered then).
+def test_case_automation_prompt(test_case, page_objects=None, prompt_stats=None):
+    context = ""
+    if page_objects:
+        tokens = test_case_feature_tokens(test_case)
+        context = page_objects.prompt_context(tokens, budget_tokens=PAGE_OBJECT_CONTEXT_BUDGET)
+    prompt = build_test_case_automation_prompt(test_case, context)
+
+    def on_request():
+        if prompt_stats is not None:
+            prompt_stats.record(build_test_case_automation_prompt(test_case, context, compact=False),
+                                prompt, AUTOMATION_SYSTEM_INSTRUCTION)
+
+    return prompt, on_request
+
+# Function to build the compacted combined automation prompt for test cases.
+# Returns (prompt, on_request) as test_case_automation_prompt does.
+def combined_automation_prompt(test_cases, suite_name="GeneratedTestSuite", page_objects=None, prompt_stats=None):
+    context = ""
+    if page_objects:
+        tokens = set().union(*(test_case_feature_tokens(tc) for tc in test_cases))
+        context = page_objects.prompt_context(tokens, budget_tokens=PAGE_OBJECT_CONTEXT_BUDGET)
+    prompt = build_combined_automation_prompt(test_cases, suite_name, context)
+
+    def on_request():
+        if prompt_stats is not None:
+            prompt_stats.record(build_combined_automation_prompt(test_cases, suite_name, context, compact=False),
+                                prompt, AUTOMATION_SYSTEM_INSTRUCTION)
+
+    return prompt, on_request
+
 # Function to generate Java Selenium code for a test case
-def generate_test_case_automation_code(test_case):
+def generate_test_case_automation_code(test_case, on_chunk=None):
     try:
-        prompt_template = f"""
-        You are a super senior QA automation engineer with over 30 years of enterprise experience. 
-        Write complete, production-grade Selenium test automation code in Java using TestNG and Page Object Model.
-        
-        Based on the following test case:
-        - Title: {test_case['title']}
-        - Steps: 
-        {chr(10).join(test_case['test_steps'])}
-        - Expected Results: 
-        {chr(10).join(test_case['expected_results'])}
-        
-        Generate the following:
-        
-        1. Page Object class for the relevant page(s)
-        2. Test class that extends BaseTest
-        3. Any necessary helper classes
-        
-        Use the following enterprise standards:
-        - Java 17
-        - Selenium WebDriver
-        - TestNG
-        - Page Object Model with @FindBy annotations
-        - Factory Pattern for WebDriver
-        - Singleton for configuration
-        - Log4j2 logging
-        - Allure reporting annotations
-        - Explicit waits with WebDriverWait
-        - Meaningful assertions
-        - Thread-safe implementation
-        
-        Output the code in the following format:
-        
-        // FILE: src/main/java/com/qa/pages/[PageName]Page.java
-        [Java code here]
-        
-        // FILE: src/test/java/com/qa/tests/[TestName]Test.java
-        [Java code here]
-        """
-        
-        response = model.generate_content(prompt_template)
-        return response.text
+        prompt, on_request = test_case_automation_prompt(test_case, st.session_state.page_objects,
+                                                         st.session_state.prompt_stats)
+        return request_generation(prompt, on_chunk, AUTOMATION_SYSTEM_INSTRUCTION, on_request)
     except Exception as e:
         st.error(f"Error generating automation code: {str(e)}")
         return ""
 
+# Function to generate Java Selenium code for many test cases with bounded concurrency.
+# Yields (test_case, files, error) as each call finishes; runs no Streamlit calls in the
+# worker threads so results can be rendered from the script thread. Every call is told about
+# the Page Objects registered before the first one starts, and registers the ones it produced.
+def generate_automation_code_concurrently(test_cases, max_workers=4, timeout=None, page_objects=None,
+                                          prompt_stats=None):
+    # Render every prompt up front, in order, from one registry snapshot, so a prompt (and its
+    # response cache key) does not depend on which earlier call happened to finish first
+    prompts = [test_case_automation_prompt(tc, page_objects, prompt_stats) for tc in test_cases]
+
+    def worker(idx):
+        request_options = {"timeout": timeout} if timeout else None
+        prompt, on_request = prompts[idx]
+        files = parse_generated_code(generate_text(
+            gemini_client.model_for(AUTOMATION_SYSTEM_INSTRUCTION),
+            prompt,
+            cache=response_cache,
+            request_options=request_options,
+            scheduler=request_scheduler,
+            priority=BULK,
+            on_request=on_request
+        ))
+        return page_objects.register(files) if page_objects else files
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(worker, idx): tc for idx, tc in enumerate(test_cases)}
+        for future in as_completed(futures):
+            test_case = futures[future]
+            try:
+                yield test_case, future.result(), None
+            except Exception as e:
+                yield test_case, {}, e
+
 # Function to generate combined Java Selenium code for multiple test cases
-def generate_combined_automation_code(test_cases):
+def generate_combined_automation_code(test_cases, on_chunk=None):
     try:
-        test_cases_str = "\n\n".join(
-            [f"Test Case {idx+1}: {tc['title']}\n"
-             f"Steps:\n{chr(10).join(tc['test_steps'])}\n"
-             f"Expected Results:\n{chr(10).join(tc['expected_results'])}"
-             for idx, tc in enumerate(test_cases)]
-        )
-        
-        prompt_template = f"""
-        You are a super senior QA automation engineer with over 30 years of enterprise experience. 
-        Write complete, production-grade Selenium test automation code in Java using TestNG and Page Object Model.
-        
-        Create a SINGLE test class that includes test methods for the following test cases:
-        
-        {test_cases_str}
-        
-        Generate the following:
-        
-        1. Page Object classes for the relevant page(s)
-        2. A single test class that extends BaseTest and contains multiple @Test methods (one for each test case above)
-        3. Any necessary helper classes
-        
-        Use the following enterprise standards:
-        - Java 17
-        - Selenium WebDriver
-        - TestNG
-        - Page Object Model with @FindBy annotations
-        - Factory Pattern for WebDriver
-        - Singleton for configuration
-        - Log4j2 logging
-        - Allure reporting annotations
-        - Explicit waits with WebDriverWait
-        - Meaningful assertions
-        - Thread-safe implementation
-        
-        Output the code in the following format:
-        
-        // FILE: src/main/java/com/qa/pages/[PageName]Page.java
-        [Java code here]
-        
-        // FILE: src/test/java/com/qa/tests/GeneratedTestSuite.java
-        [Java code for the combined test suite]
-        """
-        
-        response = model.generate_content(prompt_template)
-        return response.text
+        prompt, on_request = combined_automation_prompt(test_cases, page_objects=st.session_state.page_objects,
+                                                        prompt_stats=st.session_state.prompt_stats)
+        return request_generation(prompt, on_chunk, AUTOMATION_SYSTEM_INSTRUCTION, on_request)
     except Exception as e:
         st.error(f"Error generating combined automation code: {str(e)}")
         return ""
 
-# Function to parse generated code
-def parse_generated_code(code):
-    files = {}
-    current_file = None
-    current_content = []
-    
-    for line in code.split('\n'):
-        if line.startswith("// FILE: "):
-            if current_file:
-                files[current_file] = "\n".join(current_content)
-                current_content = []
-            current_file = line.split("// FILE: ")[1].strip()
-        elif current_file:
-            current_content.append(line)
-    
-    if current_file and current_content:
-        files[current_file] = "\n".join(current_content)
-    
-    return files
+# Function to estimate the tokens of the combined automation prompt for test cases (Page Object context aside)
+def combined_prompt_tokens(test_cases):
+    return estimate_tokens(build_combined_automation_prompt(test_cases))
+
+# Function to generate a combined suite for a large selection in concurrent shards.
+# Shards of related test cases are split further until each prompt fits COMBINED_PROMPT_BUDGET,
+# so no steps or assertions are cut. Each shard gets its own suite class; shard outputs are
+# merged in shard order and Page Objects generated by several shards are merged into one
+# class per file.
+# on_progress(done, total) is called from the calling thread as each shard finishes.
+# With a page_objects registry, every shard reuses the Page Objects registered before the
+# first shard starts; all shard prompts are rendered from that one snapshot, in shard order.
+def generate_sharded_automation_code(test_cases, shard_size=MAX_CASES_PER_SHARD, max_workers=4, timeout=None,
+                                     on_progress=None, page_objects=None, prompt_stats=None):
+    shards = split_to_budget(shard_test_cases(test_cases, shard_size), combined_prompt_tokens, COMBINED_PROMPT_BUDGET)
+    request_options = {"timeout": timeout} if timeout else None
+    prompts = [combined_automation_prompt(shard, f"GeneratedTestSuite{idx + 1}", page_objects, prompt_stats)
+               for idx, shard in enumerate(shards)]
+
+    def worker(idx):
+        prompt, on_request = prompts[idx]
+        files = parse_generated_code(generate_text(
+            gemini_client.model_for(AUTOMATION_SYSTEM_INSTRUCTION),
+            prompt,
+            cache=response_cache,
+            request_options=request_options,
+            scheduler=request_scheduler,
+            priority=BULK,
+            on_request=on_request
+        ))
+        return page_objects.register(files) if page_objects else files
+
+    results = [{} for _ in shards]
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(worker, idx): idx for idx in range(len(shards))}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                errors.append(e)
+            if on_progress:
+                on_progress(done, len(shards))
+    return merge_generated_files(results), errors
+
+# Function to render streamed generated code incrementally.
+# Completed "// FILE:" blocks are added as expanders as soon as the next header arrives,
+# while the file still being received is previewed live below them.
+def render_code_stream(container):
+    parser = IncrementalCodeParser()
+    with container:
+        files_area = st.container()
+        live_preview = st.empty()
+
+    def on_chunk(chunk):
+        for file_name, content in parser.feed(chunk):
+            with files_area.expander(f"📄 {file_name}"):
+                st.code(content, language='java')
+        if parser.current_file:
+            live_preview.code(f"// FILE: {parser.current_file}\n{parser.current_text}", language='java')
+
+    return on_chunk
 
 # Function to show toast notification
 def show_toast(message):
@@ -507,10 +663,302 @@ def show_toast(message):
     st.session_state.toast_message = message
     st.session_state.toast_time = time.time()  # Record display time
 
+# Function to render the body of a test case card
+def render_test_case_details(test_case):
+    st.markdown(f"**Priority:** `{test_case.priority}`")
+
+    if test_case.preconditions:
+        st.markdown("**Preconditions:**")
+        for pre in test_case.preconditions:
+            st.markdown(f"- {pre}")
+
+    if test_case.test_data:
+        st.markdown("**Test Data:**")
+        for data in test_case.test_data:
+            st.markdown(f"- {data}")
+
+    st.markdown("**Steps:**")
+    for step in test_case.test_steps:
+        st.markdown(f"- {step}")
+
+    st.markdown("**Expected Results:**")
+    for result in test_case.expected_results:
+        st.markdown(f"- {result}")
+
+    if test_case.attachments:
+        st.markdown("**Attachments:**")
+        for attachment in test_case.attachments:
+            attachment_key = f"attach_{test_case.id}_{attachment['name']}"
+            if attachment['type'].startswith('image'):
+                st.image(str(blob_store.thumbnail(attachment['blob'])), caption=attachment['name'], use_column_width=True)
+            elif st.session_state.get(f"prepare_{attachment_key}"):
+                # Bytes are only read from the blob store once a download is requested
+                st.download_button(
+                    label=f"Download {attachment['name']}",
+                    data=blob_store.get(attachment['blob']),
+                    file_name=attachment['name'],
+                    mime=attachment['type'],
+                    key=attachment_key
+                )
+            else:
+                st.button(f"📎 {attachment['name']} ({attachment['size'] / 1024:.1f} KB)",
+                          key=f"prepare_{attachment_key}")
+
+# Function to filter test cases for the management list.
+# Text queries go through the collection's inverted index and come back ranked; without a
+# query IDs keep collection order. The result is cached in session state per collection
+# version and filter values, so reruns that change neither skip the work entirely.
+def filter_test_cases(priorities, id_prefix, search_text):
+    collection = st.session_state.test_cases
+    cache_key = (collection.version, tuple(priorities), id_prefix, search_text.lower())
+    cached = st.session_state.filtered_test_cases
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+    priorities = set(priorities)
+    candidate_ids = collection.search(search_text) if search_text else collection.ids()
+    matching_ids = [
+        case_id for case_id in candidate_ids
+        if (not priorities or collection.priority(case_id) in priorities)
+        and (not id_prefix or case_id.startswith(id_prefix))
+    ]
+    st.session_state.filtered_test_cases = (cache_key, matching_ids)
+    return matching_ids
+
+# Function to map a session automation_code key to its key in the store.
+# The combined suite is stored per selection so it is only restored for the same test cases.
+def artifact_store_key(key, case_ids=None):
+    if key == "combined":
+        if case_ids is None:
+            case_ids = [tc.id for tc in st.session_state.selected_test_cases]
+        return "combined:" + hashlib.sha1(",".join(case_ids).encode("utf-8")).hexdigest()
+    return key
+
+# Function to fingerprint everything that determines a test case's generated code.
+# Hashing the rendered prompt means template changes invalidate fragments as well as edits.
+# The Page Object context is left out on purpose: registering new pages must not make every
+# class look stale.
+def automation_fingerprint(test_case):
+    payload = f"{gemini_client.model_name}\n{AUTOMATION_SYSTEM_INSTRUCTION}\n{build_test_case_automation_prompt(test_case)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def is_automation_code_current(test_case):
+    return (test_case.id in st.session_state.automation_code
+            and st.session_state.automation_fingerprints.get(test_case.id) == automation_fingerprint(test_case))
+
+# Function to record generated files in the session and queue them for the store.
+# Page Objects are registered for reuse and replaced by their canonical merged versions.
+def save_automation_code(key, files, fingerprint=None):
+    files = st.session_state.page_objects.register(files)
+    st.session_state.automation_code[key] = files
+    st.session_state.automation_fingerprints[key] = fingerprint
+    st.session_state.pending_artifacts[artifact_store_key(key)] = (files, fingerprint)
+    # The assembled project no longer reflects the generated code
+    st.session_state.framework_generated = False
+
+# Function to lazily restore stored automation code for the current selection.
+# Skipped while one of this session's automation jobs is running: a regeneration clears the
+# session's code, and restoring the stored classes would show stale code as the new output.
+def load_stored_automation_code():
+    if automation_job_pending():
+        return
+    keys = {artifact_store_key(key): key
+            for key in ["combined"] + [tc.id for tc in st.session_state.selected_test_cases]
+            if key not in st.session_state.automation_code}
+    if keys:
+        for store_key, (files, fingerprint) in test_case_store.load_artifacts(keys).items():
+            st.session_state.page_objects.register(files)
+            st.session_state.automation_code[keys[store_key]] = files
+            st.session_state.automation_fingerprints[keys[store_key]] = fingerprint
+
+# Function to tell whether this session has an automation generation job still running
+def automation_job_pending():
+    for job_id in st.session_state.jobs:
+        job = job_queue.get(job_id)
+        if job is not None and job.kind == "automation" and not job.finished:
+            return True
+    return False
+
+# Function to store a combined suite generated for the given selection.
+# If the session has moved on to another selection the suite is only stored for later.
+def save_combined_automation_code(case_ids, files):
+    if case_ids == [tc.id for tc in st.session_state.selected_test_cases]:
+        save_automation_code("combined", files)
+    else:
+        st.session_state.pending_artifacts[artifact_store_key("combined", case_ids)] = (files, None)
+
+# Function to re-assemble the combined suite for a selection from its per-test-case fragments
+def assemble_combined_automation_code(case_ids):
+    fragments = [st.session_state.automation_code[case_id]
+                 for case_id in case_ids if case_id in st.session_state.automation_code]
+    if fragments:
+        save_combined_automation_code(case_ids, merge_generated_files(fragments))
+
+# Background job: map-reduce test case generation, one result per finished section
+def test_case_generation_job(job, text, num_cases, priority, max_workers, timeout):
+    _, errors = generate_test_cases_map_reduce(
+        text,
+        num_cases,
+        priority,
+        max_workers=max_workers,
+        timeout=timeout,
+        on_progress=job.progress,
+        on_section=lambda idx, cases: job.add_result({"section": idx, "cases": [tc.to_dict() for tc in cases]})
+    )
+    for error in errors:
+        job.add_error(f"Error generating test cases: {error}")
+
+# Background job: concurrent per-test-case automation code, one result per finished class
+def automation_generation_job(job, test_cases, max_workers, timeout, page_objects, prompt_stats):
+    job.progress(0, len(test_cases))
+    for done, (test_case, files, error) in enumerate(
+        generate_automation_code_concurrently(test_cases, max_workers=max_workers, timeout=timeout,
+                                              page_objects=page_objects, prompt_stats=prompt_stats),
+        start=1
+    ):
+        if error:
+            job.add_error(f"Error generating automation code for {test_case.id}: {error}")
+        else:
+            job.add_result({"key": test_case.id, "files": files})
+        job.progress(done, len(test_cases))
+
+# Background job: sharded combined suite, a single result once every shard is merged
+def sharded_automation_job(job, test_cases, shard_size, max_workers, timeout, page_objects, prompt_stats):
+    files, errors = generate_sharded_automation_code(
+        test_cases,
+        shard_size=shard_size,
+        max_workers=max_workers,
+        timeout=timeout,
+        on_progress=job.progress,
+        page_objects=page_objects,
+        prompt_stats=prompt_stats
+    )
+    for error in errors:
+        job.add_error(f"Error generating combined automation code: {error}")
+    if files:
+        job.add_result({"key": "combined", "files": files})
+
+# Function to queue a background job for this session
+def submit_job(kind, label, fn, *args, params=None):
+    job_id = job_queue.submit(kind, label, fn, *args, params=params)
+    st.session_state.jobs[job_id] = 0  # results applied so far
+    return job_id
+
+# Function to apply background job results to this session.
+# Automation code is applied as each class arrives; generated test cases are added once the
+# whole job has finished so IDs and de-duplication match an inline run. Finished jobs are
+# dropped from the session. Returns True if any job finished.
+def apply_job_results():
+    finished_any = False
+    for job_id, applied in list(st.session_state.jobs.items()):
+        job = job_queue.get(job_id)
+        if job is None:
+            del st.session_state.jobs[job_id]
+            continue
+        if job.kind == "automation":
+            for result in job_queue.results(job_id, applied):
+                if result["key"] == "combined":
+                    save_combined_automation_code(job.params["case_ids"], result["files"])
+                else:
+                    save_automation_code(result["key"], result["files"], job.params["fingerprints"].get(result["key"]))
+                applied += 1
+            st.session_state.jobs[job_id] = applied
+        if not job.finished:
+            continue
+
+        finished_any = True
+        del st.session_state.jobs[job_id]
+        if job.kind == "test_cases":
+            sections = sorted(job_queue.results(job_id), key=lambda result: result["section"])
+            generated_cases = merge_section_test_cases(
+                [[TestCase(**data) for data in result["cases"]] for result in sections],
+                job.params["num_cases"]
+            )
+            if generated_cases:
+                add_generated_test_cases(generated_cases, job.params["id_prefix"])
+        elif job.kind == "automation":
+            if job.params["assemble"]:
+                # Re-assemble the combined suite from the per-test-case fragments
+                assemble_combined_automation_code(job.params["case_ids"])
+            if applied:
+                show_toast(f"✅ {job.label} finished")
+        if job.errors:
+            st.session_state.job_errors.extend(job.errors)
+        if job.status == INTERRUPTED:
+            st.session_state.job_errors.append(f"{job.label} was interrupted by a restart")
+    if finished_any:
+        persist_pending_changes()
+    return finished_any
+
+# Background job panel, polled while jobs are in flight so progress updates without
+# blocking the page; a finished job triggers a full rerun to show its results.
+def render_background_jobs():
+    if apply_job_results():
+        st.rerun()
+    for job_id in st.session_state.jobs:
+        job = job_queue.get(job_id)
+        if job is None:
+            continue
+        fraction = job.done / job.total if job.total else 0.0
+        st.progress(fraction, text=f"{job.label}: {job.done}/{job.total or '?'} ({job.status})")
+        if job.errors:
+            st.caption(f"⚠️ {len(job.errors)} error(s) so far")
+
+# Results of jobs that finished since the last run
+apply_job_results()
+
 # Sidebar navigation
 st.sidebar.title("Navigation")
 page = st.sidebar.radio("Go to", ["Home", "Test Case Generator", "Test Automation"])
 
+# Response cache statistics
+with st.sidebar.expander("Response Cache"):
+    cache_stats = response_cache.stats()
+    col1, col2 = st.columns(2)
+    col1.metric("Hits", cache_stats["hits"])
+    col2.metric("Misses", cache_stats["misses"])
+    st.caption(f"{cache_stats['entries']} entries | {cache_stats['bytes'] / (1024 * 1024):.1f} MB on disk")
+    if st.button("Clear Cache", key="clear_response_cache"):
+        response_cache.clear()
+        st.rerun()
+
+# Background jobs for this session
+if st.session_state.jobs:
+    with st.sidebar:
+        st.subheader("Background Jobs")
+        st.fragment(render_background_jobs, run_every=JOB_POLL_SECONDS)()
+if st.session_state.job_errors:
+    with st.sidebar.expander(f"⚠️ Job Errors ({len(st.session_state.job_errors)})", expanded=True):
+        for error in st.session_state.job_errors:
+            st.error(error)
+        if st.button("Dismiss", key="dismiss_job_errors"):
+            st.session_state.job_errors = []
+            st.rerun()
+
+# Health of the shared resources
+with st.sidebar.expander("System Health"):
+    gemini_status = "🟢 Connected" if gemini_client.healthy else f"🔴 {gemini_client.last_error}"
+    st.caption(f"Gemini: {gemini_status}" if model_backend == GEMINI else f"Model backend: {model_backend} ({gemini_status})")
+    try:
+        database_status = "🟢 OK" if test_case_store.ping() else "🔴 Unexpected response"
+    except Exception as e:
+        database_status = f"🔴 {e}"
+    st.caption(f"Database: {database_status}")
+    col1, col2 = st.columns(2)
+    if col1.button("Check Now", key="check_health"):
+        gemini_client.check_health()
+        st.rerun()
+    if col2.button("Reconnect", key="reconnect_gemini"):
+        gemini_client.close()
+        st.rerun()
+
+# Rate limiter statistics
+with st.sidebar.expander("Request Scheduler"):
+    scheduler_stats = request_scheduler.stats()
+    col1, col2 = st.columns(2)
+    col1.metric("Requests", scheduler_stats["requests"])
+    col2.metric("Retries", scheduler_stats["retries"])
+    st.caption(f"{scheduler_stats['waiting']} waiting | {scheduler_stats['throttled_seconds']:.0f}s spent waiting for quota")
+
 # Home Page
 if page == "Home":
     st.markdown("""
@@ -549,6 +997,31 @@ elif page == "Test Case Generator":
             index=1
         )
         
+        st.checkbox("**Stream Output**", key="stream_output",
+                    help="Render Gemini output as it arrives instead of waiting for the full response")
+        st.slider(
+            "**Concurrent Requests**",
+            min_value=1,
+            max_value=16,
+            key="max_workers",
+            help="Maximum number of Gemini calls in flight when generating from large requirements"
+        )
+        
+        st.selectbox(
+            "**Duplicate Handling**",
+            ["Off", "Flag", "Auto-merge"],
+            key="duplicate_mode",
+            help="Detect near-duplicate test cases (by title and steps) when they are added"
+        )
+        st.slider(
+            "**Similarity Threshold**",
+            min_value=0.70,
+            max_value=0.99,
+            step=0.01,
+            key="duplicate_threshold",
+            disabled=st.session_state.duplicate_mode == "Off"
+        )
+        
         st.markdown("---")
         st.markdown("**About**")
         st.markdown("Create professional test cases using AI")
@@ -612,38 +1085,29 @@ elif page == "Test Case Generator":
                     st.error("Please fill in all required fields (marked with *)")
                 else:
                     # Process attachments
-                    attachments_data = []
-                    for file in attachments:
-                        if file.type.startswith('image'):
-                            content = base64.b64encode(file.read()).decode('utf-8')
-                            attachments_data.append({
-                                "name": file.name,
-                                "type": file.type,
-                                "content": content
-                            })
-                        else:
-                            attachments_data.append({
-                                "name": file.name,
-                                "type": file.type,
-                                "content": file.read()
-                            })
+                    attachments_data = [
+                        attachment_ref(blob_store, file.name, file.type, file.getvalue())
+                        for file in attachments
+                    ]
                     
                     # Create test case object
-                    test_case = {
-                        "id": f"TC_{module_name}_{len(st.session_state.test_cases) + 1}",
-                        "title": title,
-                        "preconditions": [p.strip() for p in preconditions.split('\n') if p.strip()],
-                        "test_data": [d.strip() for d in test_data.split('\n') if d.strip()],
-                        "test_steps": [s.strip() for s in steps.split('\n') if s.strip()],
-                        "expected_results": [e.strip() for e in expected.split('\n') if e.strip()],
-                        "priority": priority,
-                        "attachments": attachments_data,
-                        "selected": False
-                    }
+                    test_case = TestCase(
+                        id=test_case_store.allocate_ids(f"TC_{module_name}_")[0],
+                        title=title,
+                        preconditions=[p.strip() for p in preconditions.split('\n') if p.strip()],
+                        test_data=[d.strip() for d in test_data.split('\n') if d.strip()],
+                        test_steps=[s.strip() for s in steps.split('\n') if s.strip()],
+                        expected_results=[e.strip() for e in expected.split('\n') if e.strip()],
+                        priority=priority,
+                        attachments=attachments_data
+                    )
                     
                     # Save to session state
-                    st.session_state.test_cases.append(test_case)
-                    show_toast("✅ Test case saved successfully!")
+                    if handle_near_duplicates([test_case]):
+                        st.session_state.test_cases.append(test_case)
+                        show_toast("✅ Test case saved successfully!")
+                    else:
+                        show_toast("✅ Test case merged into an existing near-duplicate")
     
     with tab2:
         st.subheader("Generate Test Cases from Requirements")
@@ -654,34 +1118,115 @@ elif page == "Test Case Generator":
             label_visibility="collapsed"
         )
         
+        requirement_files = st.file_uploader(
+            "Upload requirement documents",
+            type=['txt', 'pdf', 'docx', 'csv', 'xlsx'],
+            accept_multiple_files=True,
+            key="requirement_files"
+        )
+        
+        requirement_chunks = []
+        if requirement_files:
+            extraction_progress = st.progress(0.0, text="Extracting requirements...")
+            requirement_chunks = ingest_requirement_files(
+                requirement_files,
+                on_progress=lambda fraction, file_name: extraction_progress.progress(
+                    fraction, text=f"Extracting {file_name}..."
+                )
+            )
+            extraction_progress.empty()
+            total_chars = sum(len(chunk) for chunk in requirement_chunks)
+            st.markdown(
+                f'<div class="file-info">📄 {len(requirement_files)} file(s) ingested: '
+                f'{len(requirement_chunks)} chunks, {total_chars:,} characters</div>',
+                unsafe_allow_html=True
+            )
+        
+        use_retrieval = False
+        if len(requirement_chunks) > 1:
+            col1, col2 = st.columns(2)
+            with col1:
+                use_retrieval = st.checkbox(
+                    "Use semantic retrieval",
+                    value=len(requirement_chunks) > 20 and st.session_state.embedding_available,
+                    help="Only send the uploaded chunks most relevant to the requirements above to Gemini"
+                )
+            with col2:
+                retrieval_top_k = st.slider(
+                    "Relevant chunks (top-k)",
+                    min_value=1,
+                    max_value=min(100, len(requirement_chunks)),
+                    value=min(20, len(requirement_chunks)),
+                    disabled=not use_retrieval
+                )
+        
         num_test_cases = st.slider(
-            "Number of Test Cases to Generate (1-50)",
+            "Number of Test Cases to Generate (1-200)",
             min_value=1,
-            max_value=50,
+            max_value=200,
             value=10,
             step=1
         )
+        if requirement_chunks and not use_retrieval:
+            sent_sections, total_sections, sent_share = plan_coverage(
+                "\n\n".join(part for part in [user_story] + requirement_chunks if part), num_test_cases
+            )
+            if sent_sections < total_sections:
+                st.warning(
+                    f"The requirements split into {total_sections} sections, but only {sent_sections} of them "
+                    f"({sent_share:.0%} of the text) can be sent for {num_test_cases} test cases; sections in "
+                    f"between get no test cases. Increase the number of test cases or use semantic retrieval "
+                    f"to focus on the relevant parts."
+                )
         
         if st.button("Generate Test Cases", use_container_width=True):
-            if user_story:
+            if user_story or requirement_chunks:
+                if use_retrieval and user_story:
+                    with st.spinner("Retrieving relevant requirement sections..."):
+                        try:
+                            requirement_chunks = retrieve_relevant_chunks(requirement_chunks, user_story, retrieval_top_k)
+                        except Exception as e:
+                            # e.g. faiss/sentence-transformers missing or the model cannot be downloaded offline
+                            st.session_state.requirement_index = None
+                            st.warning(f"Semantic retrieval is unavailable ({e}); using all uploaded content.")
+                elif use_retrieval:
+                    st.info("Enter a user story or focus area above to enable retrieval; using all uploaded content.")
+                requirements_text = "\n\n".join(part for part in [user_story] + requirement_chunks if part)
+                if num_test_cases > MAX_CASES_PER_CALL or len(requirements_text) > MAX_SECTION_CHARS:
+                    # Large requirements or many cases: generate per section in parallel in the background
+                    submit_job(
+                        "test_cases",
+                        f"{num_test_cases} test cases",
+                        test_case_generation_job,
+                        requirements_text,
+                        num_test_cases,
+                        priority,
+                        st.session_state.max_workers,
+                        st.session_state.request_timeout,
+                        params={"num_cases": num_test_cases, "id_prefix": f"TC_{module_name}_G"}
+                    )
+                    sent_sections, total_sections, sent_share = plan_coverage(requirements_text, num_test_cases)
+                    coverage = (f" from {sent_sections} of {total_sections} sections ({sent_share:.0%} of the text)"
+                                if sent_sections < total_sections else "")
+                    show_toast(f"⏳ Generating {num_test_cases} test cases{coverage} in the background")
+                    st.rerun()
                 with st.spinner(f"Generating {num_test_cases} professional test cases..."):
-                    generated_cases = generate_test_cases_from_prompt(user_story, num_test_cases, priority)
+                    on_chunk = None
+                    live_output = st.empty()
+                    if st.session_state.stream_output:
+                        received = []
+                        def on_chunk(chunk):
+                            received.append(chunk)
+                            live_output.code("".join(received), language='json')
+                    generated_cases = generate_test_cases_from_prompt(requirements_text, num_test_cases, priority, on_chunk)
+                    live_output.empty()
                     
                     if generated_cases:
-                        # Assign unique IDs
-                        for i, tc in enumerate(generated_cases):
-                            tc["id"] = f"TC_{module_name}_G{len(st.session_state.test_cases) + i + 1}"
-                            tc["selected"] = False
-                            # Ensure attachments field exists
-                            if "attachments" not in tc:
-                                tc["attachments"] = []
-                        
-                        st.session_state.test_cases.extend(generated_cases)
-                        show_toast(f"✅ Successfully generated {len(generated_cases)} test cases!")
+                        add_generated_test_cases(generated_cases, f"TC_{module_name}_G")
                     else:
                         st.error("Failed to generate test cases. Please try again with more specific requirements.")
             else:
-                st.warning("Please enter requirements to generate test cases")
+                st.warning("Please enter or upload requirements to generate test cases")
     
     # Bulk actions
     if st.session_state.test_cases:
@@ -692,25 +1237,23 @@ elif page == "Test Case Generator":
             st.markdown('<div class="bulk-actions">', unsafe_allow_html=True)
             
             # Select all checkbox
-            all_selected = all(tc.get('selected', False) for tc in st.session_state.test_cases)
+            all_selected = st.session_state.test_cases.all_selected
             select_all = st.checkbox("Select All", value=all_selected, key="select_all")
             
             # Update all test cases based on Select All
-            if select_all:
-                for tc in st.session_state.test_cases:
-                    tc['selected'] = True
+            if select_all and not all_selected:
+                st.session_state.test_cases.select_all(True)
             elif not select_all and all_selected:
-                for tc in st.session_state.test_cases:
-                    tc['selected'] = False
+                st.session_state.test_cases.select_all(False)
             
             # Copy all button
             if st.button("Copy All Test Cases", key="copy_all"):
                 # Create a copyable string of all test cases
                 test_cases_str = "\n\n".join(
-                    [f"ID: {tc['id']}\nTitle: {tc['title']}\nPriority: {tc['priority']}\n\nSteps:\n" + 
-                     "\n".join([f"- {step}" for step in tc['test_steps']]) +
+                    [f"ID: {tc.id}\nTitle: {tc.title}\nPriority: {tc.priority}\n\nSteps:\n" + 
+                     "\n".join([f"- {step}" for step in tc.test_steps]) +
                      "\n\nExpected Results:\n" + 
-                     "\n".join([f"- {result}" for result in tc['expected_results']])
+                     "\n".join([f"- {result}" for result in tc.expected_results])
                     for tc in st.session_state.test_cases]
                 )
                 
@@ -718,12 +1261,10 @@ elif page == "Test Case Generator":
                 st.rerun()  # FIXED: Changed from experimental_rerun to rerun
             
             # Generate automation for selected
-            selected_count = sum(1 for tc in st.session_state.test_cases if tc.get('selected', False))
+            selected_count = st.session_state.test_cases.selected_count
             if selected_count > 0:
                 if st.button(f"Generate Automation for {selected_count} Test Cases", key="gen_selected"):
-                    st.session_state.selected_test_cases = [
-                        tc for tc in st.session_state.test_cases if tc.get('selected', False)
-                    ]
+                    st.session_state.selected_test_cases = st.session_state.test_cases.selected()
                     st.experimental_set_query_params(page="Test Automation")
                     st.rerun()
             else:
@@ -731,9 +1272,7 @@ elif page == "Test Case Generator":
             
             # Delete selected button
             if st.button("Delete Selected", key="delete_selected"):
-                st.session_state.test_cases = [
-                    tc for tc in st.session_state.test_cases if not tc.get('selected', False)
-                ]
+                st.session_state.test_cases.remove_selected()
                 show_toast(f"✅ Deleted {selected_count} test cases")
             
             st.markdown('</div>', unsafe_allow_html=True)
@@ -741,66 +1280,70 @@ elif page == "Test Case Generator":
         # Test case container with scroll
         st.markdown('<div class="test-case-container">', unsafe_allow_html=True)
         
-        # Display all test cases
-        for idx, test_case in enumerate(st.session_state.test_cases):
+        # Filters and pagination: only the visible page of test cases builds widgets
+        col1, col2, col3 = st.columns([4, 2, 3])
+        with col1:
+            search_text = st.text_input("Search", key="test_case_search",
+                                        placeholder="Search titles, steps, preconditions and expected results")
+        with col2:
+            id_prefix = st.text_input("ID Prefix", key="test_case_id_prefix", placeholder="TC_AUTH_G")
+        with col3:
+            priority_filter = st.multiselect("Priority", list(PRIORITIES), key="test_case_priority_filter")
+        
+        filtered_ids = filter_test_cases(priority_filter, id_prefix.strip(), search_text.strip())
+        
+        col1, col2, col3 = st.columns([2, 2, 5])
+        with col1:
+            page_size = st.selectbox("Per Page", [10, 25, 50, 100], index=1, key="test_case_page_size")
+        page_count = max(1, -(-len(filtered_ids) // page_size))
+        if st.session_state.get("test_case_page", 1) > page_count:
+            st.session_state.test_case_page = page_count
+        with col2:
+            page_number = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="test_case_page")
+        start = (page_number - 1) * page_size
+        visible_ids = filtered_ids[start:start + page_size]
+        with col3:
+            st.caption(f"Showing {start + 1 if visible_ids else 0}-{start + len(visible_ids)} of "
+                       f"{len(filtered_ids)} matching test cases ({len(st.session_state.test_cases)} total)")
+        
+        if search_text.strip():
+            st.markdown(
+                f'<div class="search-results">🔎 {len(filtered_ids)} test cases match '
+                f'<span class="highlight">{html.escape(search_text.strip())}</span>, best matches first</div>',
+                unsafe_allow_html=True
+            )
+        
+        # Display the visible test cases
+        for test_case in st.session_state.test_cases.get_many(visible_ids):
             with st.container():
                 col1, col2, col3 = st.columns([1, 10, 2])
                 
                 with col1:
                     # Checkbox for selection
                     selected = st.checkbox("", 
-                                         value=test_case.get('selected', False), 
-                                         key=f"select_{test_case['id']}",
+                                         value=st.session_state.test_cases.is_selected(test_case.id), 
+                                         key=f"select_{test_case.id}",
                                          label_visibility="collapsed")
                     
                     # Update selection state
-                    test_case['selected'] = selected
+                    st.session_state.test_cases.set_selected(test_case.id, selected)
                 
                 with col2:
-                    # Test case card
-                    with st.expander(f"{test_case['id']}: {test_case['title']}", expanded=False):
-                        st.markdown(f"**Priority:** `{test_case['priority']}`")
-                        
-                        if test_case['preconditions']:
-                            st.markdown("**Preconditions:**")
-                            for pre in test_case['preconditions']:
-                                st.markdown(f"- {pre}")
-                        
-                        if test_case.get('test_data'):
-                            st.markdown("**Test Data:**")
-                            for data in test_case['test_data']:
-                                st.markdown(f"- {data}")
-                        
-                        st.markdown("**Steps:**")
-                        for step in test_case['test_steps']:
-                            st.markdown(f"- {step}")
-                        
-                        st.markdown("**Expected Results:**")
-                        for result in test_case['expected_results']:
-                            st.markdown(f"- {result}")
-                        
-                        if test_case.get('attachments'):
-                            st.markdown("**Attachments:**")
-                            for attachment in test_case['attachments']:
-                                if attachment['type'].startswith('image'):
-                                    st.image(base64.b64decode(attachment['content']), caption=attachment['name'], use_column_width=True)
-                                else:
-                                    st.download_button(
-                                        label=f"Download {attachment['name']}",
-                                        data=attachment['content'],
-                                        file_name=attachment['name'],
-                                        mime=attachment['type'],
-                                        key=f"attach_{test_case['id']}_{attachment['name']}"
-                                    )
+                    # Test case card; the body is only built while the card is open
+                    card_label = f"{test_case.id}: {test_case.title}"
+                    if test_case.duplicate_of:
+                        card_label += f" ⚠️ similar to {test_case.duplicate_of}"
+                    if st.toggle(card_label, key=f"open_{test_case.id}"):
+                        with st.container(border=True):
+                            render_test_case_details(test_case)
                 
                 with col3:
                     # Edit button
-                    if st.button("✏️ Edit", key=f"edit_{test_case['id']}"):
+                    if st.button("✏️ Edit", key=f"edit_{test_case.id}"):
                         st.session_state.editing_test_case = test_case
-                        st.session_state.editing_index = idx
                     
                     # Generate automation for single test case
-                    if st.button("🤖 Generate", key=f"gen_single_{test_case['id']}"):
+                    if st.button("🤖 Generate", key=f"gen_single_{test_case.id}"):
                         st.session_state.selected_test_cases = [test_case]
                         st.experimental_set_query_params(page="Test Automation")
                         st.rerun()
@@ -822,35 +1365,34 @@ elif page == "Test Case Generator":
     # Edit test case modal
     if st.session_state.editing_test_case:
         test_case = st.session_state.editing_test_case
-        idx = st.session_state.editing_index
         
-        with st.form(f"edit_form_{test_case['id']}"):
-            st.subheader(f"Editing: {test_case['id']}")
+        with st.form(f"edit_form_{test_case.id}"):
+            st.subheader(f"Editing: {test_case.id}")
             
-            title = st.text_input("Test Scenario*", value=test_case['title'])
+            title = st.text_input("Test Scenario*", value=test_case.title)
             
             col1, col2 = st.columns(2)
             with col1:
                 preconditions = st.text_area("Preconditions", 
-                                           value="\n".join(test_case['preconditions']), 
+                                           value="\n".join(test_case.preconditions), 
                                            height=100)
             with col2:
                 test_data = st.text_area("Test Data", 
-                                       value="\n".join(test_case.get('test_data', [])), 
+                                       value="\n".join(test_case.test_data), 
                                        height=100)
             
             steps = st.text_area("Test Steps*", 
-                                value="\n".join(test_case['test_steps']), 
+                                value="\n".join(test_case.test_steps), 
                                 height=150)
             
             expected = st.text_area("Expected Results*", 
-                                  value="\n".join(test_case['expected_results']), 
+                                  value="\n".join(test_case.expected_results), 
                                   height=100)
             
             priority = st.selectbox(
                 "Priority",
                 ["High", "Medium", "Low"],
-                index=["High", "Medium", "Low"].index(test_case['priority'])
+                index=["High", "Medium", "Low"].index(test_case.priority)
             )
             
             # Form actions
@@ -858,17 +1400,17 @@ elif page == "Test Case Generator":
             with col1:
                 if st.form_submit_button("Save Changes", use_container_width=True):
                     # Update test case
-                    st.session_state.test_cases[idx] = {
-                        "id": test_case['id'],
-                        "title": title,
-                        "preconditions": [p.strip() for p in preconditions.split('\n') if p.strip()],
-                        "test_data": [d.strip() for d in test_data.split('\n') if d.strip()],
-                        "test_steps": [s.strip() for s in steps.split('\n') if s.strip()],
-                        "expected_results": [e.strip() for e in expected.split('\n') if e.strip()],
-                        "priority": priority,
-                        "attachments": test_case.get('attachments', []),  # FIXED: Use get with default
-                        "selected": test_case.get('selected', False)
-                    }
+                    if test_case.id in st.session_state.test_cases:
+                        st.session_state.test_cases.replace(test_case.id, TestCase(
+                            id=test_case.id,
+                            title=title,
+                            preconditions=[p.strip() for p in preconditions.split('\n') if p.strip()],
+                            test_data=[d.strip() for d in test_data.split('\n') if d.strip()],
+                            test_steps=[s.strip() for s in steps.split('\n') if s.strip()],
+                            expected_results=[e.strip() for e in expected.split('\n') if e.strip()],
+                            priority=priority,
+                            attachments=test_case.attachments
+                        ))
                     st.session_state.editing_test_case = None
                     show_toast("✅ Test case updated successfully!")
                     st.rerun()  # FIXED: Changed from experimental_rerun to rerun
@@ -880,8 +1422,48 @@ elif page == "Test Case Generator":
 
 # Test Automation Page
 elif page == "Test Automation":
+    with st.sidebar:
+        st.header("Configuration")
+        st.slider(
+            "**Concurrent Requests**",
+            min_value=1,
+            max_value=16,
+            key="max_workers",
+            help="Maximum number of Gemini calls in flight when generating separate test classes or suite shards"
+        )
+        st.number_input(
+            "**Request Timeout (seconds)**",
+            min_value=10,
+            max_value=600,
+            step=10,
+            key="request_timeout",
+            help="Per-call timeout for Gemini requests"
+        )
+        st.slider(
+            "**Cases per Shard**",
+            min_value=2,
+            max_value=25,
+            key="shard_size",
+            help="Larger combined suites are split into shards of related test cases generated concurrently"
+        )
+        st.checkbox("**Stream Output**", key="stream_output",
+                    help="Render generated files as they arrive (combined suite or a single test case)")
+        if st.session_state.generation_mode == "Combined Test Suite":
+            st.checkbox("**Incremental Regeneration**", key="incremental_combined",
+                        help="Only regenerate code for test cases that changed and assemble the suite from "
+                             "per-test-case classes, instead of generating it in shards of related test cases")
+        else:
+            st.checkbox("**Incremental Regeneration**", key="incremental_generation",
+                        help="Only regenerate code for test cases that changed")
+        st.caption(f"♻️ {len(st.session_state.page_objects)} Page Objects registered for reuse")
+
     st.subheader("🤖 Java Selenium Automation Generator")
     
+    # Pick up edits made to the selected test cases since they were sent to automation
+    st.session_state.selected_test_cases = [
+        st.session_state.test_cases.get(tc.id) or tc for tc in st.session_state.selected_test_cases
+    ]
+    
     if st.session_state.selected_test_cases:
         st.success(f"Generating automation code for {len(st.session_state.selected_test_cases)} test cases")
         
@@ -895,23 +1477,88 @@ elif page == "Test Automation":
         )
         st.markdown('</div>', unsafe_allow_html=True)
         
+        # Restore previously generated code for this selection before deciding what to regenerate
+        load_stored_automation_code()
+        
         # Generate automation code
         if st.button("Generate Automation Code", key="generate_automation", use_container_width=True):
             with st.spinner("Generating production-ready Java Selenium code..."):
-                st.session_state.automation_code = {}
+                selected_cases = st.session_state.selected_test_cases
+                combined_mode = st.session_state.generation_mode == "Combined Test Suite"
+                incremental = (st.session_state.incremental_combined if combined_mode
+                               else st.session_state.incremental_generation)
+                if incremental:
+                    # Only test cases added or changed since their code was generated go to Gemini
+                    stale_cases = [tc for tc in selected_cases if not is_automation_code_current(tc)]
+                else:
+                    st.session_state.automation_code = {}
+                    st.session_state.automation_fingerprints = {}
+                    stale_cases = list(selected_cases)
                 
-                if st.session_state.generation_mode == "Combined Test Suite":
+                stream_area = st.empty()
+                selected_ids = [tc.id for tc in selected_cases]
+                if combined_mode and not incremental and (len(selected_cases) > st.session_state.shard_size
+                                                          or combined_prompt_tokens(selected_cases) > COMBINED_PROMPT_BUDGET):
+                    # Generate the combined suite in the background, in concurrent shards of related test cases
+                    # (also for a few test cases whose combined prompt is over budget)
+                    submit_job(
+                        "automation",
+                        f"Combined suite for {len(selected_cases)} test cases",
+                        sharded_automation_job,
+                        list(selected_cases),
+                        st.session_state.shard_size,
+                        st.session_state.max_workers,
+                        st.session_state.request_timeout,
+                        st.session_state.page_objects,
+                        st.session_state.prompt_stats,
+                        params={"case_ids": selected_ids, "assemble": False, "fingerprints": {}}
+                    )
+                    show_toast("⏳ Generating the combined test suite in the background")
+                    st.rerun()
+                elif combined_mode and not incremental:
                     # Generate combined test suite
-                    automation_code = generate_combined_automation_code(st.session_state.selected_test_cases)
+                    on_chunk = render_code_stream(stream_area.container()) if st.session_state.stream_output else None
+                    automation_code = generate_combined_automation_code(selected_cases, on_chunk)
+                    stream_area.empty()
                     if automation_code:
-                        st.session_state.automation_code["combined"] = parse_generated_code(automation_code)
+                        save_automation_code("combined", parse_generated_code(automation_code))
                         show_toast("✅ Combined test suite generated successfully!")
-                else:
-                    # Generate separate files for each test case
-                    for test_case in st.session_state.selected_test_cases:
-                        automation_code = generate_test_case_automation_code(test_case)
-                        st.session_state.automation_code[test_case['id']] = parse_generated_code(automation_code)
-                    show_toast("✅ Automation code generated successfully!")
+                elif st.session_state.stream_output and len(stale_cases) == 1:
+                    # Stream a single test class straight into the page
+                    test_case = stale_cases[0]
+                    automation_code = generate_test_case_automation_code(test_case, render_code_stream(stream_area.container()))
+                    stream_area.empty()
+                    if automation_code:
+                        save_automation_code(test_case.id, parse_generated_code(automation_code), automation_fingerprint(test_case))
+                elif stale_cases:
+                    # Generate separate files for each test case concurrently in the background;
+                    # classes appear as they finish and the combined suite is assembled at the end
+                    submit_job(
+                        "automation",
+                        f"Automation code for {len(stale_cases)} test cases",
+                        automation_generation_job,
+                        stale_cases,
+                        st.session_state.max_workers,
+                        st.session_state.request_timeout,
+                        st.session_state.page_objects,
+                        st.session_state.prompt_stats,
+                        params={
+                            "case_ids": selected_ids,
+                            "assemble": combined_mode,
+                            "fingerprints": {tc.id: automation_fingerprint(tc) for tc in stale_cases}
+                        }
+                    )
+                    show_toast(f"⏳ Generating automation code for {len(stale_cases)} test cases in the background")
+                    st.rerun()
+                
+                if not (combined_mode and not incremental):
+                    generated = sum(1 for tc in stale_cases if is_automation_code_current(tc))
+                    reused = len(selected_cases) - len(stale_cases)
+                    if combined_mode:
+                        # Re-assemble the combined suite from the per-test-case fragments
+                        assemble_combined_automation_code(selected_ids)
+                    if generated or reused:
+                        show_toast(f"✅ Generated code for {generated} test cases, reused {reused} unchanged")
         
         if st.session_state.automation_code:
             # Combined Test Suite View
@@ -925,78 +1572,105 @@ elif page == "Test Automation":
                     with st.expander(f"📄 {file_name}"):
                         st.code(content, language='java')
                 
-                # Create a zip file for download
-                zip_buffer = BytesIO()
-                with zipfile.ZipFile(zip_buffer, 'a', zipfile.ZIP_DEFLATED, False) as zip_file:
-                    for file_name, content in st.session_state.automation_code["combined"].items():
-                        zip_file.writestr(file_name, content)
-                
-                zip_buffer.seek(0)
-                st.download_button(
-                    label="Download Combined Test Suite",
-                    data=zip_buffer,
-                    file_name="CombinedTestSuite.zip",
-                    mime="application/zip",
-                    use_container_width=True
-                )
+                # Zip file for download, compressed once per distinct suite
+                with archive_cache.open(st.session_state.automation_code["combined"]) as zip_file:
+                    st.download_button(
+                        label="Download Combined Test Suite",
+                        data=zip_file,
+                        file_name="CombinedTestSuite.zip",
+                        mime="application/zip",
+                        use_container_width=True
+                    )
                 
                 # Display test cases in suite
                 st.markdown("### Test Cases in this Suite")
                 for test_case in st.session_state.selected_test_cases:
-                    with st.expander(f"{test_case['id']}: {test_case['title']}"):
-                        st.markdown(f"**Priority:** `{test_case['priority']}`")
+                    with st.expander(f"{test_case.id}: {test_case.title}"):
+                        st.markdown(f"**Priority:** `{test_case.priority}`")
                         st.markdown("**Steps:**")
-                        for step in test_case['test_steps']:
+                        for step in test_case.test_steps:
                             st.markdown(f"- {step}")
                         
                         st.markdown("**Expected Results:**")
-                        for result in test_case['expected_results']:
+                        for result in test_case.expected_results:
                             st.markdown(f"- {result}")
             
             # Separate Files View
             elif st.session_state.generation_mode == "Separate Test Classes":
+                # Compress any per-test-case archives that are not cached yet, in parallel
+                archive_cache.build_many(
+                    [st.session_state.automation_code[tc.id] for tc in st.session_state.selected_test_cases
+                     if tc.id in st.session_state.automation_code],
+                    max_workers=st.session_state.max_workers
+                )
+                
                 # Tabs for each test case
-                tabs = st.tabs([f"Test Case: {tc['id']}" for tc in st.session_state.selected_test_cases])
+                tabs = st.tabs([f"Test Case: {tc.id}" for tc in st.session_state.selected_test_cases])
                 
                 for idx, test_case in enumerate(st.session_state.selected_test_cases):
                     with tabs[idx]:
-                        st.markdown(f"### {test_case['title']}")
-                        st.markdown(f"**ID:** {test_case['id']} | **Priority:** `{test_case['priority']}`")
+                        st.markdown(f"### {test_case.title}")
+                        st.markdown(f"**ID:** {test_case.id} | **Priority:** `{test_case.priority}`")
                         
                         # Display test case details
                         with st.expander("Test Case Details", expanded=False):
                             st.markdown("**Steps:**")
-                            for step in test_case['test_steps']:
+                            for step in test_case.test_steps:
                                 st.markdown(f"- {step}")
                             
                             st.markdown("**Expected Results:**")
-                            for result in test_case['expected_results']:
+                            for result in test_case.expected_results:
                                 st.markdown(f"- {result}")
                         
                         # Display automation code
-                        if test_case['id'] in st.session_state.automation_code:
+                        if test_case.id in st.session_state.automation_code:
                             st.subheader("Generated Automation Code")
                             
-                            for file_name, content in st.session_state.automation_code[test_case['id']].items():
+                            for file_name, content in st.session_state.automation_code[test_case.id].items():
                                 with st.expander(f"📄 {file_name}"):
                                     st.code(content, language='java')
                             
-                            # Create a zip file for download
-                            zip_buffer = BytesIO()
-                            with zipfile.ZipFile(zip_buffer, 'a', zipfile.ZIP_DEFLATED, False) as zip_file:
-                                for file_name, content in st.session_state.automation_code[test_case['id']].items():
-                                    zip_file.writestr(file_name, content)
-                            
-                            zip_buffer.seek(0)
-                            st.download_button(
-                                label=f"Download Code for {test_case['id']}",
-                                data=zip_buffer,
-                                file_name=f"{test_case['id']}_automation.zip",
-                                mime="application/zip",
-                                use_container_width=True
-                            )
+                            # Zip file for download, served from the archive cache
+                            with archive_cache.open(st.session_state.automation_code[test_case.id]) as zip_file:
+                                st.download_button(
+                                    label=f"Download Code for {test_case.id}",
+                                    data=zip_file,
+                                    file_name=f"{test_case.id}_automation.zip",
+                                    mime="application/zip",
+                                    use_container_width=True
+                                )
                         else:
                             st.info("Click 'Generate Automation Code' to create Java code")
+            
+            # Ready-to-build project: generated sources merged into one tree plus the framework
+            # skeleton rendered from local templates
+            st.markdown("### 📦 Ready-to-Build Project")
+            st.radio("Build Tool:", BUILD_TOOLS, key="project_build_tool", horizontal=True,
+                     on_change=lambda: st.session_state.update(framework_generated=False))
+            if st.session_state.generation_mode == "Combined Test Suite" and "combined" in st.session_state.automation_code:
+                project_sources = [st.session_state.automation_code["combined"]]
+            else:
+                project_sources = [st.session_state.automation_code[tc.id] for tc in st.session_state.selected_test_cases
+                                   if tc.id in st.session_state.automation_code]
+            if st.button("Assemble Project", key="assemble_project", use_container_width=True, disabled=not project_sources):
+                st.session_state.framework_code = assemble_project(
+                    project_sources,
+                    project_name="GeneratedTestSuite",
+                    build_tool=st.session_state.project_build_tool
+                )
+                st.session_state.framework_generated = True
+            if st.session_state.framework_generated:
+                with st.expander(f"Project files ({len(st.session_state.framework_code)})"):
+                    for file_name in st.session_state.framework_code:
+                        st.markdown(f"- `{file_name}`")
+                with archive_cache.open(st.session_state.framework_code) as zip_file:
+                    st.download_button(
+                        label=f"Download {st.session_state.project_build_tool} Project",
+                        data=zip_file,
+                        file_name="GeneratedTestSuite.zip",
+                        mime="application/zip",
+                        use_container_width=True
+                    )
         else:
             st.info("Click the button above to generate automation code")
     else:
@@ -1015,6 +1689,32 @@ if st.session_state.get('show_toast'):
         # Automatically hide after 3 seconds
         st.session_state.show_toast = False
 
+# Persist this run's changes
+persist_pending_changes()
+
+# Startup and rerun timing report
+HEAVY_MODULES = ("google.generativeai", "PyPDF2", "docx", "pandas", "faiss", "sentence_transformers")
+startup_timings = get_startup_timings()
+run_seconds = time.perf_counter() - script_started
+startup_timings.setdefault("imports", imports_finished - script_started)
+startup_timings.setdefault("first_run", run_seconds)
+with st.sidebar.expander("Performance"):
+    st.caption(f"Cold start: {startup_timings['imports']:.2f}s imports, {startup_timings['first_run']:.2f}s first run")
+    st.caption(f"This run: {run_seconds:.2f}s")
+    loaded_modules = [name for name in HEAVY_MODULES if name in sys.modules]
+    st.caption(f"Heavy modules loaded: {', '.join(loaded_modules) or 'none'}")
+    archive_stats = archive_cache.stats()
+    st.caption(f"ZIP archives: {archive_stats['builds']} built, {archive_stats['hits']} served from cache")
+    # Prompts this session sent to Gemini (background jobs included, cached responses not)
+    token_stats = st.session_state.prompt_stats.stats()
+    if token_stats["prompts"]:
+        st.caption(f"Automation prompts this session: {token_stats['prompts']}, ~{token_stats['sent_tokens']:,} "
+                   f"input tokens sent; compacting test case inputs removed ~{token_stats['compacted_tokens']:,}")
+    run_prompts = token_stats["prompts"] - prompt_stats_at_start["prompts"]
+    if run_prompts:
+        run_sent = token_stats["sent_tokens"] - prompt_stats_at_start["sent_tokens"]
+        st.caption(f"This run: {run_prompts} automation prompts, ~{run_sent:,} input tokens sent")
+
 # Footer
 st.markdown("---")
 st.markdown('<div class="footer">QE Test Automation Suite | Powered by Gemini 1.5 Flash</div>', 
@@ -0,0 +1,91 @@
+import json
+import re
+
+# Trailing commas before a closing bracket, a common model slip ({"a": 1,})
+TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+
+
+# Function to decode one JSON object, retrying once with trailing commas removed
+def loads_tolerant(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(TRAILING_COMMA_PATTERN.sub(r'\1', text))
+
+
+# Incremental extractor for the objects of a JSON array in model output.
+# Text is fed in arbitrary chunks (e.g. straight from a streaming response); each element
+# object is decoded as soon as its closing brace arrives, so a truncated response still
+# yields every complete element. The array is located by its key ("test_cases": [...]),
+# falling back to a bare top-level array; surrounding prose and code fences are ignored.
+class JsonArrayStreamParser:
+    def __init__(self, key):
+        self.key_pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self.complete = False  # the array's closing bracket has been seen
+        self.invalid = 0  # complete elements that could not be decoded
+        self._buffer = ""
+        self._position = None  # scan position inside the array once it has been found
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._element_start = None
+
+    def _find_array(self):
+        match = self.key_pattern.search(self._buffer)
+        if match:
+            return match.end()
+        stripped = self._buffer.lstrip()
+        if stripped.startswith("```"):
+            stripped = stripped.partition("\n")[2].lstrip()
+        if stripped.startswith("["):
+            return len(self._buffer) - len(stripped) + 1
+        return None
+
+    # Returns the elements completed by this chunk
+    def feed(self, text):
+        self._buffer += text
+        if self.complete:
+            return []
+        if self._position is None:
+            self._position = self._find_array()
+            if self._position is None:
+                return []
+
+        elements = []
+        buffer = self._buffer
+        i = self._position
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._element_start = i
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the array itself
+                    self.complete = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        elements.append(loads_tolerant(buffer[self._element_start:i + 1]))
+                    except ValueError:
+                        self.invalid += 1
+                    self._element_start = None
+            i += 1
+        self._position = i
+        return elements
+
+
+# Function to extract every complete element of the keyed array from a full response
+def extract_json_array(text, key):
+    return JsonArrayStreamParser(key).feed(text)
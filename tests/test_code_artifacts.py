@@ -0,0 +1,108 @@
+from code_artifacts import (IncrementalCodeParser, java_member_key, merge_generated_files, merge_java_sources,
+                            parse_generated_code)
+
+LOGIN_PAGE = """package com.qa.pages;
+
+import org.openqa.selenium.WebDriver;
+
+public class LoginPage {
+    @FindBy(id = "user")
+    private WebElement username;
+
+    public void login(String user) {
+        username.sendKeys(user);
+    }
+}"""
+
+LOGIN_PAGE_WITH_LOGOUT = """package com.qa.pages;
+
+import org.openqa.selenium.WebDriver;
+import org.openqa.selenium.By;
+
+public class LoginPage {
+    @FindBy(id = "user")
+    private WebElement username;
+
+    public void login(String name) {
+        // a different body for the same method
+        username.clear();
+    }
+
+    public void logout() {
+        driver.findElement(By.id("logout")).click();
+    }
+}"""
+
+
+def test_parse_generated_code_splits_files():
+    code = "intro text\n// FILE: a/A.java\nclass A {}\n// FILE: b/B.java\nclass B {\n}\n"
+    assert parse_generated_code(code) == {"a/A.java": "class A {}", "b/B.java": "class B {\n}\n"}
+
+
+def test_incremental_parser_emits_files_when_the_next_header_arrives():
+    parser = IncrementalCodeParser()
+    assert parser.feed("// FILE: A.java\nclass A {") == []
+    assert parser.current_file == "A.java"
+    assert parser.current_text == "class A {"
+    assert parser.feed("}\n// FILE: B.ja") == []  # the header line is not complete yet
+    assert parser.feed("va\nclass B {}") == [("A.java", "class A {}")]
+    assert parser.close() == [("B.java", "class B {}")]
+
+
+def test_truncated_output_keeps_the_partial_last_file():
+    parser = IncrementalCodeParser()
+    parser.feed("// FILE: A.java\nclass A {\n    void run() {")
+    assert parser.close() == [("A.java", "class A {\n    void run() {")]
+
+
+def test_code_fences_and_surrounding_prose_are_dropped():
+    code = ("Here is the code:\n```java\n// FILE: A.java\nclass A {}\n```\n\n"
+            "```java\n// FILE: B.java\nclass B {}\n```\nLet me know if you need more.")
+    assert parse_generated_code(code) == {"A.java": "class A {}", "B.java": "class B {}"}
+
+
+def test_fences_split_across_chunks():
+    parser = IncrementalCodeParser()
+    chunks = ["``", "`java\n// FILE: A.java\ncla", "ss A {}\n`", "``\n"]
+    completed = [file for chunk in chunks for file in parser.feed(chunk)] + parser.close()
+    assert completed == [("A.java", "class A {}")]
+
+
+def test_java_member_key_ignores_annotations_and_parameter_names():
+    assert java_member_key("@Test\npublic void login(String user) {}") == "login(String)"
+    assert java_member_key("public void login(String name) { x(); }") == "login(String)"
+    assert java_member_key('@FindBy(id = "user")\nprivate WebElement username;') == "username"
+
+
+def test_merge_java_sources_keeps_duplicate_members_once():
+    merged = merge_java_sources(LOGIN_PAGE, LOGIN_PAGE_WITH_LOGOUT)
+    assert merged.count("login(String") == 1
+    assert "username.sendKeys(user);" in merged  # the first version of a shared member wins
+    assert merged.count("private WebElement username;") == 1
+    assert "public void logout()" in merged
+    assert merged.count("import org.openqa.selenium.WebDriver;") == 1
+    assert "import org.openqa.selenium.By;" in merged
+    assert merged.rstrip().endswith("}")
+
+
+def test_merge_java_sources_leaves_unparseable_sources_alone():
+    assert merge_java_sources(LOGIN_PAGE, "not java at all") == LOGIN_PAGE
+
+
+def test_merge_java_sources_handles_braces_in_strings_and_comments():
+    first = 'public class A {\n    String s = "}";\n    // } in a comment\n    void a() {}\n}'
+    second = 'public class A {\n    void b() { if (x) { y(); } }\n}'
+    merged = merge_java_sources(first, second)
+    assert 'String s = "}";' in merged
+    assert "void a() {}" in merged
+    assert "void b()" in merged
+
+
+def test_merge_generated_files_merges_shared_java_classes_only():
+    merged = merge_generated_files([
+        {"pages/LoginPage.java": LOGIN_PAGE, "notes.txt": "first"},
+        {"pages/LoginPage.java": LOGIN_PAGE_WITH_LOGOUT, "notes.txt": "second", "tests/T.java": "class T {}"}
+    ])
+    assert set(merged) == {"pages/LoginPage.java", "notes.txt", "tests/T.java"}
+    assert "logout" in merged["pages/LoginPage.java"]
+    assert merged["notes.txt"] == "first"
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from file_processors import ExtractionCache, extract_files_in_pool
+
+
+def test_extraction_cache_evicts_least_recently_used_first():
+    cache = ExtractionCache(max_chars=10)
+    cache.set_chunks("a", ["12345"])
+    cache.set_error("b", ValueError("bad"))
+    cache.get("a")  # "b" is now the least recently used
+    cache.set_chunks("c", ["1234"])
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_extraction_cache_keeps_an_oversized_newest_entry():
+    cache = ExtractionCache(max_chars=10)
+    cache.set_chunks("a", ["123"])
+    assert cache.set_chunks("big", iter(["x" * 50])) == (["x" * 50], None)
+    assert len(cache) == 1 and "big" in cache
+
+
+def test_extraction_cache_stores_errors_as_messages():
+    cache = ExtractionCache()
+    cache.set_error("a", ValueError("unreadable"))
+    assert cache.get("a") == (None, "unreadable")
+    assert cache.get("missing") is None
+
+
+def test_pool_errors_are_reported_by_file_index():
+    files = [("same.txt", "application/x-unknown", b"one"), ("same.txt", "text/plain", b"two")]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        file_chunks, errors = extract_files_in_pool(executor, files)
+    assert file_chunks == [None, ["two"]]
+    assert [file_index for file_index, _ in errors] == [0]
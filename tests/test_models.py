@@ -0,0 +1,83 @@
+import models
+
+
+def make_case(case_id, title="Login", steps=("Open the login page",)):
+    return models.TestCase(id=case_id, title=title, test_steps=list(steps), expected_results=["Done"])
+
+
+def stored_collection(*case_ids):
+    stored = {case_id: make_case(case_id) for case_id in case_ids}
+    index = [(case_id, "Medium") for case_id in case_ids]
+    return models.TestCaseCollection(index=index, loader=lambda ids: {case_id: stored[case_id] for case_id in ids})
+
+
+def ids(cases):
+    return [tc.id for tc in cases]
+
+
+def test_new_cases_are_added_not_edited():
+    collection = models.TestCaseCollection()
+    collection.extend([make_case("TC_1"), make_case("TC_2")])
+    collection.touch("TC_1")
+    added, edited, deleted = collection.drain_changes()
+    assert ids(added) == ["TC_1", "TC_2"]
+    assert edited == [] and deleted == []
+    assert collection.drain_changes() == ([], [], [])
+
+
+def test_replace_with_the_same_id_is_an_edit():
+    collection = stored_collection("TC_1", "TC_2")
+    collection.replace("TC_2", make_case("TC_2", title="Edited"))
+    added, edited, deleted = collection.drain_changes()
+    assert added == [] and deleted == []
+    assert ids(edited) == ["TC_2"] and edited[0].title == "Edited"
+
+
+def test_replace_with_a_new_id_adds_and_deletes():
+    collection = stored_collection("TC_1", "TC_2")
+    collection.set_selected("TC_1", True)
+    collection.touch("TC_1")
+    collection.replace("TC_1", make_case("TC_9"))
+    added, edited, deleted = collection.drain_changes()
+    assert ids(added) == ["TC_9"]
+    assert edited == []
+    assert deleted == ["TC_1"]
+    assert list(collection.ids()) == ["TC_9", "TC_2"]
+    assert collection.is_selected("TC_9") and not collection.is_selected("TC_1")
+
+
+def test_renaming_an_unsaved_case_records_no_delete():
+    collection = stored_collection("TC_1")
+    collection.append(make_case("TC_2"))
+    collection.replace("TC_2", make_case("TC_3"))
+    added, edited, deleted = collection.drain_changes()
+    assert ids(added) == ["TC_3"]
+    assert edited == [] and deleted == []
+
+
+def test_removing_an_unsaved_case_records_nothing():
+    collection = stored_collection("TC_1")
+    collection.append(make_case("TC_2"))
+    collection.remove(["TC_2", "TC_1"])
+    assert collection.drain_changes() == ([], [], ["TC_1"])
+
+
+def test_reassign_id_renames_without_recording_a_change():
+    collection = models.TestCaseCollection([make_case("TC_1"), make_case("TC_2")])
+    collection.drain_changes()
+    collection.set_selected("TC_2", True)
+    collection.reassign_id("TC_2", "TC_7")
+    assert collection.drain_changes() == ([], [], [])
+    assert list(collection.ids()) == ["TC_1", "TC_7"]
+    assert collection.get("TC_7").id == "TC_7" and collection.get("TC_2") is None
+    assert collection.is_selected("TC_7")
+    assert set(collection.search("login")) == {"TC_1", "TC_7"}
+
+
+def test_search_prefix_matches_the_last_word_and_ignores_stop_words():
+    collection = models.TestCaseCollection([make_case("TC_1", title="Login with valid user"),
+                                     make_case("TC_2", title="Search products", steps=["Type a query"])])
+    assert collection.search("log") == ["TC_1"]
+    assert collection.search("valid us") == ["TC_1"]
+    assert collection.search("the") == ["TC_1", "TC_2"]
+    assert collection.search("missing") == []
@@ -0,0 +1,33 @@
+from prompt_budget import MAX_LINE_CHARS, PromptStats, compact_lines, split_to_budget, truncate_text
+
+
+def test_compact_lines_keeps_every_line():
+    lines = ["  Open   the\tlogin page ", "", "Click Next", "Click Next", "x" * (MAX_LINE_CHARS + 50)]
+    compacted = compact_lines(lines)
+    assert compacted[:3] == ["Open the login page", "Click Next", "Click Next"]
+    assert len(compacted) == 4
+    assert len(compacted[3]) <= MAX_LINE_CHARS and compacted[3].endswith("…")
+
+
+def test_truncate_text_cuts_at_a_word_boundary():
+    assert truncate_text("short", 10) == "short"
+    assert truncate_text("alpha beta gamma delta", 12) == "alpha beta…"
+
+
+def test_split_to_budget_halves_groups_until_they_fit():
+    groups = split_to_budget([list(range(7)), [9]], lambda group: 10 * len(group), 25)
+    assert [item for group in groups for item in group] == [0, 1, 2, 3, 4, 5, 6, 9]  # order is kept
+    assert all(len(group) * 10 <= 25 for group in groups)
+
+
+def test_split_to_budget_keeps_a_single_item_over_budget():
+    assert split_to_budget([["big", "small"]], lambda group: 100 if "big" in group else 1, 10) == [["big"], ["small"]]
+
+
+def test_prompt_stats_counts_compaction_separately():
+    stats = PromptStats()
+    stats.record("a   b   c   " * 40, "a b c " * 40, "standards " * 20)
+    result = stats.stats()
+    assert result["prompts"] == 1
+    assert result["compacted_tokens"] > 0
+    assert result["sent_tokens"] > result["compacted_tokens"]
@@ -0,0 +1,43 @@
+from structured_output import JsonArrayStreamParser, extract_json_array, loads_tolerant
+
+
+def test_elements_are_emitted_as_they_complete():
+    parser = JsonArrayStreamParser("test_cases")
+    assert parser.feed('{"test_cases": [{"title": "A"}, {"ti') == [{"title": "A"}]
+    assert parser.feed('tle": "B"}]}') == [{"title": "B"}]
+    assert parser.complete
+
+
+def test_truncated_response_keeps_complete_elements():
+    text = '{"test_cases": [{"title": "A", "test_steps": ["x"]}, {"title": "B", "test_st'
+    assert extract_json_array(text, "test_cases") == [{"title": "A", "test_steps": ["x"]}]
+
+
+def test_code_fence_and_bare_array():
+    text = '```json\n[{"title": "A"}, {"title": "B"}]\n```'
+    assert extract_json_array(text, "test_cases") == [{"title": "A"}, {"title": "B"}]
+
+
+def test_brackets_and_escaped_quotes_inside_strings():
+    text = '{"test_cases": [{"title": "Click \\"]\\" then {x}"}]}'
+    assert extract_json_array(text, "test_cases") == [{"title": 'Click "]" then {x}'}]
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = '{"test_cases": [{"title": "A", "steps": ["a", "b"]}, {"title": "B\\\\"}]}'
+    parser = JsonArrayStreamParser("test_cases")
+    elements = []
+    for char in text:
+        elements.extend(parser.feed(char))
+    assert elements == extract_json_array(text, "test_cases") == [{"title": "A", "steps": ["a", "b"]},
+                                                                   {"title": "B\\"}]
+
+
+def test_invalid_elements_are_counted_and_skipped():
+    parser = JsonArrayStreamParser("test_cases")
+    assert parser.feed('{"test_cases": [{"title": }, {"title": "B",}]}') == [{"title": "B"}]
+    assert parser.invalid == 1
+
+
+def test_loads_tolerant_strips_trailing_commas():
+    assert loads_tolerant('{"a": [1, 2,],}') == {"a": [1, 2]}